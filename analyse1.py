@@ -22,6 +22,9 @@ columns_of_interest = {
     "home_support": "Soutien à la Maison"
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(columns_of_interest.keys())
+
 def show_statistics(df):
     """Affiche les statistiques descriptives et les visualisations."""
     
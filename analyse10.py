@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import scipy.stats as stats
 from docx import Document
 from docx.shared import Inches
 import tempfile
 import os
 
+from composants import permutation_option
+from derivees import derived_features, group_index
+from statistiques import mann_whitney_batch
+
 # Définition des colonnes pour l'analyse
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -24,6 +27,9 @@ score_columns = {
     "problems": "Résolution de Problèmes"
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + ["stgender"]
+
 def show_gender_effect(df):
     """Affiche l'analyse de l'effet du genre sur les performances."""
     
@@ -40,8 +46,9 @@ def show_gender_effect(df):
     
     try:
         # Préparation des données
-        df_analysis = df.copy()
-        df_analysis["gender"] = df_analysis["stgender"].map({1: "Garçon", 0: "Fille"}).fillna("Inconnu")
+        # Ajout de la colonne dérivée sans copier les données source (Copy-on-Write)
+        features = derived_features(df)
+        df_analysis = df.assign(gender=features["gender"])
         
         # 1. Moyenne des scores par genre
         st.subheader("📊 Moyenne des scores par genre")
@@ -108,22 +115,37 @@ def show_gender_effect(df):
         # 3. Tests statistiques
         st.subheader("📊 Tests Statistiques (Mann-Whitney)")
         
+        # Toutes les tâches EGRA/EGMA sont classées et testées en une seule passe
+        existing_scores = [col for col in score_columns.keys() if col in df_analysis.columns]
+        gender_index = group_index(df_analysis, "gender")
+        tests = mann_whitney_batch(
+            gender_index.take(df_analysis[existing_scores], "Garçon"),
+            gender_index.take(df_analysis[existing_scores], "Fille")
+        )
+        
+        permutation_caption = permutation_option(
+            tests,
+            df_analysis[existing_scores],
+            gender_index.subset_codes(["Garçon", "Fille"]),
+            key="permutation-gender"
+        )
+        
         results_data = []
-        for col in list(score_columns.keys())[:6]:
-            boys_scores = df_analysis[df_analysis["gender"] == "Garçon"][col].dropna()
-            girls_scores = df_analysis[df_analysis["gender"] == "Fille"][col].dropna()
-            
-            if len(boys_scores) > 0 and len(girls_scores) > 0:
-                stat, p = stats.mannwhitneyu(boys_scores, girls_scores, alternative='two-sided')
+        for col, test in tests.iterrows():
+            if test["n1"] > 0 and test["n2"] > 0:
                 results_data.append({
                     "Variable": score_columns[col],
-                    "Statistique": f"{stat:.3f}",
-                    "p-value": f"{p:.5f}",
-                    "Interprétation": "Différence significative" if p < 0.05 else "Pas de différence significative"
+                    "Statistique": f"{test['U']:.3f}",
+                    "z": f"{test['z']:.3f}",
+                    "p-value": f"{test['p']:.5f}",
+                    "Taille d'effet (r)": f"{test['effect_size']:.3f}",
+                    "Interprétation": "Différence significative" if test["p"] < 0.05 else "Pas de différence significative"
                 })
         
         results_df = pd.DataFrame(results_data)
         st.dataframe(results_df, hide_index=True)
+        if permutation_caption:
+            st.caption(permutation_caption)
         
         # Export des résultats
         col1, col2 = st.columns(2)
@@ -207,11 +229,11 @@ def create_gender_effect_word_report(df, score_cols, results_df, mean_scores_df)
     
     # Résultats des tests statistiques
     doc.add_heading("Résultats des Tests Statistiques", level=2)
-    table = doc.add_table(rows=1, cols=4)
+    table = doc.add_table(rows=1, cols=len(results_df.columns))
     table.style = 'Table Grid'
     
     # En-têtes
-    for i, header in enumerate(["Variable", "Statistique", "p-value", "Interprétation"]):
+    for i, header in enumerate(results_df.columns):
         table.rows[0].cells[i].text = header
     
     # Données
@@ -2,12 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.figure_factory as ff
-import scipy.stats as stats
 from docx import Document
 from docx.shared import Inches
 import tempfile
 import os
 
+from derivees import derived_features
+from graphiques import scatter_with_trendline, trendlines
+from statistiques import spearman_pairs
+
 # Définition des colonnes pour l'analyse
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -25,6 +28,15 @@ score_columns = {
     "problems": "Résolution de Problèmes"
 }
 
+# Variables de contexte corrélées aux scores
+context_labels = {
+    "ses": "Statut Socio-Économique (SES)",
+    "home_support": "Soutien Parental"
+}
+
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + list(context_labels.keys())
+
 def show_ses_home_support(df):
     """Affiche l'analyse de l'impact du SES et du soutien parental."""
     
@@ -42,23 +54,27 @@ def show_ses_home_support(df):
     
     try:
         # Préparation des données
-        df_analysis = df.copy()
         existing_scores = [col for col in score_columns.keys() if col in df.columns]
-        df_analysis["total_score"] = df_analysis[existing_scores].sum(axis=1)
+        # Ajout de la colonne dérivée sans copier les données source (Copy-on-Write)
+        features = derived_features(df, existing_scores)
+        df_analysis = df.assign(total_score=features["total_score"])
         
         # 1. Relation SES et scores
         st.subheader("📊 Relation entre SES et les Scores")
         
+        # Droites de régression de tous les scores affichés en une passe vectorisée
+        ses_fits = trendlines(df_analysis, "ses", existing_scores[:6])
+        
         for i in range(0, len(existing_scores[:6]), 2):
             col1, col2 = st.columns(2)
             
             with col1:
                 if i < len(existing_scores):
-                    fig = px.scatter(
+                    fig = scatter_with_trendline(
                         df_analysis,
                         x="ses",
                         y=existing_scores[i],
-                        trendline="ols",
+                        fit=ses_fits.loc[existing_scores[i]],
                         title=f"SES vs {score_columns[existing_scores[i]]}",
                         labels={
                             "ses": "Statut Socio-Économique (SES)",
@@ -69,11 +85,11 @@ def show_ses_home_support(df):
             
             with col2:
                 if i + 1 < len(existing_scores[:6]):
-                    fig = px.scatter(
+                    fig = scatter_with_trendline(
                         df_analysis,
                         x="ses",
                         y=existing_scores[i + 1],
-                        trendline="ols",
+                        fit=ses_fits.loc[existing_scores[i + 1]],
                         title=f"SES vs {score_columns[existing_scores[i + 1]]}",
                         labels={
                             "ses": "Statut Socio-Économique (SES)",
@@ -138,14 +154,18 @@ def show_ses_home_support(df):
         # 4. Tests statistiques
         st.subheader("📊 Tests Statistiques (Corrélation de Spearman)")
         
+        # Tous les couples (variable de contexte, score), sur les lignes complètes de chaque couple
+        correlations = spearman_pairs(df_analysis, list(context_labels.keys()), existing_scores)
+        
         results_data = []
-        for col in existing_scores[:6]:
-            correlation, p_value = stats.spearmanr(df_analysis["ses"].dropna(), df_analysis[col].dropna())
+        for (context, col), correlation in correlations.iterrows():
             results_data.append({
+                "Facteur": context_labels[context],
                 "Variable": score_columns[col],
-                "Coefficient": f"{correlation:.3f}",
-                "p-value": f"{p_value:.5f}",
-                "Interprétation": "Corrélation significative" if p_value < 0.05 else "Pas de corrélation significative"
+                "Coefficient": f"{correlation['rho']:.3f}",
+                "p-value": f"{correlation['p']:.5f}",
+                "Effectif": int(correlation["n"]),
+                "Interprétation": "Corrélation significative" if correlation["p"] < 0.05 else "Pas de corrélation significative"
             })
         
         results_df = pd.DataFrame(results_data)
@@ -202,13 +222,14 @@ def create_ses_support_word_report(df, score_cols, results_df, correlation_matri
     
     # Relations SES
     doc.add_heading("Relations avec le Statut Socio-Économique", level=2)
+    ses_fits = trendlines(df, "ses", score_cols)
     with tempfile.TemporaryDirectory() as tmp_dir:
         for col in score_cols:
-            fig = px.scatter(
+            fig = scatter_with_trendline(
                 df,
                 x="ses",
                 y=col,
-                trendline="ols",
+                fit=ses_fits.loc[col],
                 title=f"SES vs {score_columns[col]}"
             )
             img_path = os.path.join(tmp_dir, f"{col}_ses_scatter.png")
@@ -250,11 +271,11 @@ def create_ses_support_word_report(df, score_cols, results_df, correlation_matri
     
     # Résultats des tests
     doc.add_heading("Résultats des Tests Statistiques", level=2)
-    table = doc.add_table(rows=1, cols=4)
+    table = doc.add_table(rows=1, cols=len(results_df.columns))
     table.style = 'Table Grid'
     
     # En-têtes
-    for i, header in enumerate(["Variable", "Coefficient", "p-value", "Interprétation"]):
+    for i, header in enumerate(results_df.columns):
         table.rows[0].cells[i].text = header
     
     # Données
@@ -23,6 +23,9 @@ international_benchmarks = {
     "problems": {"standard": 4, "nom": "Résolution de Problèmes"}
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(international_benchmarks.keys())
+
 def show_international_comparison(df):
     """Affiche la comparaison avec les standards internationaux."""
     
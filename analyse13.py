@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import scipy.stats as stats
 from docx import Document
 from docx.shared import Inches
 import tempfile
 import os
 
+from composants import permutation_option
+from derivees import group_index
+from statistiques import mann_whitney_batch
+
 # Définition des colonnes pour l'analyse
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -24,6 +27,9 @@ score_columns = {
     "problems": "Résolution de Problèmes"
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + ["language_teaching"]
+
 def show_language_comparison(df):
     """Affiche la comparaison entre écoles anglophones et néerlandophones."""
     
@@ -39,10 +45,11 @@ def show_language_comparison(df):
     """)
     
     try:
-        # Préparation des données
-        df_analysis = df.copy()
-        df_english = df_analysis[df_analysis["language_teaching"] == "English"]
-        df_dutch = df_analysis[df_analysis["language_teaching"] == "Dutch"]
+        # Préparation des données (lecture seule : aucune copie du jeu source)
+        df_analysis = df
+        languages = group_index(df_analysis, "language_teaching")
+        df_english = languages.take(df_analysis, "English")
+        df_dutch = languages.take(df_analysis, "Dutch")
         
         # 1. Moyennes par langue d'enseignement
         st.subheader("📊 Moyenne des scores par langue d'enseignement")
@@ -113,26 +120,33 @@ def show_language_comparison(df):
         # 3. Tests statistiques
         st.subheader("📊 Tests Statistiques (Mann-Whitney)")
         
+        # Toutes les tâches EGRA/EGMA sont classées et testées en une seule passe
+        existing_scores = [col for col in score_columns.keys() if col in df_analysis.columns]
+        tests = mann_whitney_batch(df_english[existing_scores], df_dutch[existing_scores])
+        
+        permutation_caption = permutation_option(
+            tests,
+            df_analysis[existing_scores],
+            languages.subset_codes(["English", "Dutch"]),
+            key="permutation-language"
+        )
+        
         results_data = []
-        for col in list(score_columns.keys())[:6]:
-            english_scores = df_english[col].dropna()
-            dutch_scores = df_dutch[col].dropna()
-            
-            if len(english_scores) > 0 and len(dutch_scores) > 0:
-                stat, p = stats.mannwhitneyu(
-                    english_scores,
-                    dutch_scores,
-                    alternative='two-sided'
-                )
+        for col, test in tests.iterrows():
+            if test["n1"] > 0 and test["n2"] > 0:
                 results_data.append({
                     "Variable": score_columns[col],
-                    "Statistique": f"{stat:.3f}",
-                    "p-value": f"{p:.5f}",
-                    "Interprétation": "Différence significative" if p < 0.05 else "Pas de différence significative"
+                    "Statistique": f"{test['U']:.3f}",
+                    "z": f"{test['z']:.3f}",
+                    "p-value": f"{test['p']:.5f}",
+                    "Taille d'effet (r)": f"{test['effect_size']:.3f}",
+                    "Interprétation": "Différence significative" if test["p"] < 0.05 else "Pas de différence significative"
                 })
         
         results_df = pd.DataFrame(results_data)
         st.dataframe(results_df, hide_index=True)
+        if permutation_caption:
+            st.caption(permutation_caption)
         
         # Export des résultats
         col1, col2 = st.columns(2)
@@ -236,11 +250,11 @@ def create_language_comparison_word_report(df, score_cols, results_df, mean_scor
     
     # Tests statistiques
     doc.add_heading("Résultats des Tests Statistiques", level=2)
-    table = doc.add_table(rows=1, cols=4)
+    table = doc.add_table(rows=1, cols=len(results_df.columns))
     table.style = 'Table Grid'
     
     # En-têtes
-    for i, header in enumerate(["Variable", "Statistique", "p-value", "Interprétation"]):
+    for i, header in enumerate(results_df.columns):
         table.rows[0].cells[i].text = header
     
     # Données
@@ -17,6 +17,9 @@ score_columns = {
     "comprehension": "Compréhension"
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys())
+
 def show_zero_scores(df):
     """Affiche l'analyse des scores zéro."""
     
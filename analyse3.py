@@ -6,6 +6,8 @@ from docx.shared import Inches
 import tempfile
 import os
 
+from statistiques import grouped_describe
+
 # Définition des colonnes pour l'analyse des comparaisons entre écoles
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -17,6 +19,9 @@ score_columns = {
     "comprehension": "Compréhension"
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + ["school"]
+
 def show_school_comparison(df):
     """Affiche l'analyse des comparaisons entre écoles."""
     
@@ -47,8 +52,8 @@ def show_school_comparison(df):
     if selected_columns:
         try:
             # Calcul des statistiques descriptives par école
-            stats_by_school = df.groupby("school")[selected_columns].describe().round(2)
-            stats_by_school.columns = ['_'.join(col).strip() for col in stats_by_school.columns]
+            # Noyau vectorisé : un tri par groupe, toutes les colonnes en une passe
+            stats_by_school = grouped_describe(df, "school", selected_columns).round(2)
             stats_by_school = stats_by_school.reset_index()
             
             # Affichage du tableau des statistiques
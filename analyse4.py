@@ -6,6 +6,9 @@ from docx.shared import Inches
 import tempfile
 import os
 
+from derivees import derived_features
+from statistiques import grouped_describe
+
 # Définition des colonnes pour l'analyse de l'effet des langues
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -17,20 +20,8 @@ score_columns = {
     "comprehension": "Compréhension"
 }
 
-def map_language(row):
-    """Détermine le groupe linguistique basé sur les réponses."""
-    if row["st_english_home"] == "Always":
-        return "English Always"
-    elif row["st_dutch_home"] == "Always":
-        return "Dutch Always"
-    elif row["st_english_home"] in ["Frequently", "Sometimes"]:
-        return f"English {row['st_english_home']}"
-    elif row["st_dutch_home"] in ["Frequently", "Sometimes"]:
-        return f"Dutch {row['st_dutch_home']}"
-    elif row["st_other_language"] == "Yes":
-        return "Other Language"
-    else:
-        return "Other"
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + ["st_english_home", "st_dutch_home", "st_other_language"]
 
 def show_language_effect(df):
     """Affiche l'analyse de l'effet des langues parlées à la maison."""
@@ -62,12 +53,13 @@ def show_language_effect(df):
     if selected_columns:
         try:
             # Création du groupe linguistique
-            df_analysis = df.copy()
-            df_analysis["language_group"] = df_analysis.apply(map_language, axis=1)
+            # Ajout de la colonne dérivée sans copier les données source (Copy-on-Write)
+            features = derived_features(df)
+            df_analysis = df.assign(language_group=features["language_group"])
             
             # Calcul des statistiques descriptives par groupe linguistique
-            stats_by_language = df_analysis.groupby("language_group")[selected_columns].describe().round(2)
-            stats_by_language.columns = ['_'.join(col).strip() for col in stats_by_language.columns]
+            # Noyau vectorisé : un tri par groupe, toutes les colonnes en une passe
+            stats_by_language = grouped_describe(df_analysis, "language_group", selected_columns).round(2)
             stats_by_language = stats_by_language.reset_index()
             
             # Affichage du tableau des statistiques
@@ -7,6 +7,9 @@ from docx.shared import Inches
 import tempfile
 import os
 
+from chargement import load_columns, numeric_columns
+from statistiques import correlation_matrix, strong_pairs, top_correlations
+
 # Définition des colonnes pour l'analyse des corrélations
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -18,6 +21,25 @@ score_columns = {
     "comprehension": "Compréhension"
 }
 
+# Méthodes de corrélation proposées
+correlation_methods = {
+    "Pearson": "pearson",
+    "Spearman": "spearman",
+    "Kendall": "kendall"
+}
+
+# Au-delà de ce nombre de variables, la heatmap n'est plus annotée
+max_annotated_columns = 15
+
+# Au-delà de ce nombre de variables, criblage par blocs : seules les paires les plus
+# fortes sont conservées, sans matrice complète ni heatmap
+max_matrix_columns = 100
+top_pairs = 200
+
+# Colonnes chargées pour cette analyse ; les autres variables numériques du
+# questionnaire ne sont chargées que si l'utilisateur les demande
+required_columns = list(score_columns.keys())
+
 def show_correlation(df):
     """Affiche l'analyse des corrélations entre les tâches."""
     
@@ -34,52 +56,53 @@ def show_correlation(df):
     - Les corrélations > 0.5 ou < -0.5 sont considérées comme significatives
     """)
     
-    # Calcul de la matrice de corrélation
-    corr_matrix = df[list(score_columns.keys())].corr().round(2)
-    
-    # Création du heatmap
-    st.subheader("📊 Matrice de Corrélation")
-    fig = ff.create_annotated_heatmap(
-        z=corr_matrix.values,
-        x=list(score_columns.values()),  # Utilisation des noms complets
-        y=list(score_columns.values()),  # Utilisation des noms complets
-        colorscale="viridis",
-        showscale=True
-    )
+    # Choix de la méthode et des variables
+    method = st.selectbox("Méthode de corrélation :", list(correlation_methods.keys()))
+    all_numeric = st.checkbox("Inclure toutes les variables numériques du questionnaire")
     
-    # Ajustement de la mise en page du heatmap
-    fig.update_layout(
-        height=600,
-        xaxis={'side': 'bottom'},
-        xaxis_tickangle=-45
-    )
+    if all_numeric:
+        # Projection sur les seules colonnes numériques, d'après le schéma enregistré
+        dataset_key = df.attrs.get("dataset_key")
+        if dataset_key is not None:
+            df = load_columns(dataset_key, numeric_columns(dataset_key))
+        columns = list(df.select_dtypes(include="number").columns)
+    else:
+        columns = [col for col in score_columns.keys() if col in df.columns]
+    labels = [score_columns.get(col, col) for col in columns]
     
-    st.plotly_chart(fig, use_container_width=True)
+    if len(columns) < 2:
+        st.warning("Au moins deux variables numériques sont nécessaires pour calculer des corrélations.")
+        return
     
-    # Identification des corrélations significatives
-    strong_correlations = []
-    for i in range(len(corr_matrix)):
-        for j in range(i + 1, len(corr_matrix)):  # Évite les doublons et la diagonale
-            correlation = corr_matrix.iloc[i, j]
-            if abs(correlation) > 0.5:
-                strong_correlations.append({
-                    'Tâche 1': list(score_columns.values())[i],
-                    'Tâche 2': list(score_columns.values())[j],
-                    'Corrélation': correlation
-                })
+    if len(columns) > max_matrix_columns:
+        # Criblage par blocs des grandes matrices
+        if correlation_methods[method] == "kendall":
+            st.warning(
+                f"La méthode de Kendall n'est pas disponible au-delà de {max_matrix_columns} variables : "
+                "choisissez Pearson ou Spearman."
+            )
+            return
+        st.info(
+            f"{len(columns)} variables : seules les {top_pairs} paires les plus corrélées "
+            "au-delà de |0.5| sont calculées et affichées."
+        )
+        fig = None
+        pairs = top_correlations(
+            df, columns, top_k=top_pairs, threshold=0.5, method=correlation_methods[method]
+        )
+    else:
+        fig, pairs = show_correlation_matrix(df, columns, labels, correlation_methods[method])
     
     # Affichage des corrélations significatives
-    if strong_correlations:
+    if not pairs.empty:
         st.subheader("📋 Corrélations significatives (>|0.5|)")
-        df_strong = pd.DataFrame(strong_correlations)
-        
-        # Tri par valeur absolue de corrélation
-        df_strong['Abs_Corr'] = df_strong['Corrélation'].abs()
-        df_strong = df_strong.sort_values('Abs_Corr', ascending=False)
-        df_strong = df_strong.drop('Abs_Corr', axis=1)
-        
-        # Formatage des corrélations
-        df_strong['Corrélation'] = df_strong['Corrélation'].map('{:.2f}'.format)
+        df_strong = pd.DataFrame({
+            'Tâche 1': pairs["variable_1"].map(lambda col: score_columns.get(col, col)),
+            'Tâche 2': pairs["variable_2"].map(lambda col: score_columns.get(col, col)),
+            'Corrélation': pairs["r"].map('{:.2f}'.format),
+            'Effectif': pairs["n"].astype(int),
+            'p-value': pairs["p"].map('{:.5f}'.format)
+        })
         
         st.dataframe(df_strong, hide_index=True)
         
@@ -115,6 +138,45 @@ def show_correlation(df):
     else:
         st.info("Aucune corrélation significative (>|0.5|) n'a été trouvée.")
 
+def show_correlation_matrix(df, columns, labels, method):
+    """Affiche la heatmap de corrélation et retourne la figure et les paires fortes."""
+    # Calcul des matrices de corrélation, d'effectifs et de p-values (lignes complètes par paire)
+    corr_matrix, count_matrix, p_matrix = correlation_matrix(df, columns, method)
+    corr_matrix = corr_matrix.round(2)
+    
+    # Création du heatmap
+    st.subheader("📊 Matrice de Corrélation")
+    if len(columns) <= max_annotated_columns:
+        fig = ff.create_annotated_heatmap(
+            z=corr_matrix.values,
+            x=labels,  # Utilisation des noms complets
+            y=labels,  # Utilisation des noms complets
+            colorscale="viridis",
+            showscale=True
+        )
+    else:
+        fig = px.imshow(
+            corr_matrix.values,
+            x=labels,
+            y=labels,
+            color_continuous_scale="viridis",
+            zmin=-1,
+            zmax=1
+        )
+    
+    # Ajustement de la mise en page du heatmap
+    fig.update_layout(
+        height=600,
+        xaxis={'side': 'bottom'},
+        xaxis_tickangle=-45
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Identification des corrélations significatives (triangle supérieur, triées par |r|)
+    pairs = strong_pairs(corr_matrix, count_matrix, p_matrix, threshold=0.5)
+    return fig, pairs
+
 def create_correlation_word_report(heatmap_fig, df_strong):
     """Crée un rapport Word avec la matrice de corrélation et les corrélations significatives."""
     doc = Document()
@@ -128,29 +190,28 @@ def create_correlation_word_report(heatmap_fig, df_strong):
     doc.add_paragraph("- Une corrélation proche de 0 indique une faible relation")
     doc.add_paragraph("- Les corrélations > 0.5 ou < -0.5 sont considérées comme significatives")
     
-    # Ajout de la matrice de corrélation
-    doc.add_heading("Matrice de Corrélation", level=2)
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        img_path = os.path.join(tmp_dir, "heatmap.png")
-        heatmap_fig.write_image(img_path)
-        doc.add_picture(img_path, width=Inches(6))
+    # Ajout de la matrice de corrélation (absente en criblage par blocs)
+    if heatmap_fig is not None:
+        doc.add_heading("Matrice de Corrélation", level=2)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            img_path = os.path.join(tmp_dir, "heatmap.png")
+            heatmap_fig.write_image(img_path)
+            doc.add_picture(img_path, width=Inches(6))
     
     # Ajout des corrélations significatives
     doc.add_heading("Corrélations significatives (>|0.5|)", level=2)
-    table = doc.add_table(rows=1, cols=3)
+    table = doc.add_table(rows=1, cols=len(df_strong.columns))
     table.style = 'Table Grid'
     
     # En-têtes
     header_cells = table.rows[0].cells
-    header_cells[0].text = "Tâche 1"
-    header_cells[1].text = "Tâche 2"
-    header_cells[2].text = "Corrélation"
+    for i, header in enumerate(df_strong.columns):
+        header_cells[i].text = header
     
     # Données
     for _, row in df_strong.iterrows():
         row_cells = table.add_row().cells
-        row_cells[0].text = str(row["Tâche 1"])
-        row_cells[1].text = str(row["Tâche 2"])
-        row_cells[2].text = str(row["Corrélation"])
+        for i, value in enumerate(row):
+            row_cells[i].text = str(value)
     
     return doc
\ No newline at end of file
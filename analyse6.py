@@ -6,25 +6,66 @@ from docx.shared import Inches
 import tempfile
 import os
 
+import numpy as np
+
+from derivees import cached, derived_features, group_index
+from fiabilite import BOOTSTRAP_CONFIDENCE, BOOTSTRAP_REPLICATES, bootstrap_alpha, grouped_alpha, item_reliability
+
 # Définition des colonnes pour l'analyse
 egra_columns = ["clpm", "phoneme", "sound_word", "cwpm", "listening", "orf", "comprehension"]
 egma_columns = ["number_id", "discrimin", "missing_number", "addition", "subtraction", "problems"]
 
-def cronbach_alpha(data):
-    """Calcule le coefficient alpha de Cronbach."""
-    items = data.dropna(axis=0)
-    if items.empty or items.shape[1] < 2:  # Vérification des données suffisantes
-        return None
-        
-    item_variances = items.var(axis=0, ddof=1)
-    total_variance = items.sum(axis=1).var(ddof=1)
-    num_items = items.shape[1]
-    
-    if total_variance == 0:  # Éviter la division par zéro
-        return None
-        
-    alpha = (num_items / (num_items - 1)) * (1 - sum(item_variances) / total_variance)
-    return alpha
+# Découpages proposés pour la fiabilité par sous-groupe (libellé → colonne)
+subgroup_columns = {
+    "École": "school",
+    "Genre": "stgender",
+    "Langue d'enseignement": "language_teaching"
+}
+
+# Tests dont la fiabilité est calculée par sous-groupe
+subgroup_tests = {
+    "EGRA": egra_columns,
+    "EGMA": egma_columns
+}
+
+# Colonnes chargées pour cette analyse
+required_columns = egra_columns + egma_columns + list(subgroup_columns.values())
+
+def cronbach_alpha(reliability):
+    """Retourne l'alpha de Cronbach et l'alpha standardisé d'un test (None si non calculable)."""
+    if reliability is None:  # Vérification des données suffisantes
+        return None, None
+    alpha, standardized_alpha, _ = reliability
+    return (
+        None if np.isnan(alpha) else alpha,
+        None if np.isnan(standardized_alpha) else standardized_alpha
+    )
+
+def item_table(reliability):
+    """Tableau des statistiques par item d'un test, prêt à afficher."""
+    if reliability is None:
+        return pd.DataFrame()
+    statistics = reliability[2]
+    return pd.DataFrame({
+        "Item": statistics.index,
+        "Moyenne": statistics["mean"].round(2).to_numpy(),
+        "Variance": statistics["variance"].round(2).to_numpy(),
+        "Corrélation item-total corrigée": statistics["item_total_correlation"].round(3).to_numpy(),
+        "Alpha si l'item est supprimé": statistics["alpha_if_deleted"].round(3).to_numpy()
+    })
+
+def alpha_interval(df, test, items):
+    """Intervalle de confiance bootstrap de l'alpha, calculé une seule fois par jeu de données."""
+    interval = cached(
+        df,
+        ("cronbach_ci", test),
+        lambda _: np.array(bootstrap_alpha(items) or (np.nan, np.nan))
+    )
+    return None if np.isnan(interval).any() else tuple(interval)
+
+def format_interval(interval):
+    """Formate un intervalle de confiance pour l'affichage."""
+    return f"[{interval[0]:.3f} ; {interval[1]:.3f}]" if interval is not None else "N/A"
 
 def get_reliability_color(alpha):
     """Retourne une couleur selon la valeur de l'alpha."""
@@ -92,17 +133,36 @@ def show_cronbach(df):
     """, unsafe_allow_html=True)
     
     # Calcul des coefficients alpha
-    df_egra_english = df[df["language_teaching"] == "English"]
-    df_egra_dutch = df[df["language_teaching"] == "Dutch"]
+    languages = group_index(df, "language_teaching")
+    df_egra_english = languages.take(df, "English")
+    df_egra_dutch = languages.take(df, "Dutch")
     
-    alpha_egra_english = cronbach_alpha(df_egra_english[egra_columns])
-    alpha_egra_dutch = cronbach_alpha(df_egra_dutch[egra_columns])
-    alpha_egma = cronbach_alpha(df[egma_columns])
+    # Une matrice de covariance par test : alpha, alpha standardisé et statistiques par item
+    reliability_egra_english = item_reliability(df_egra_english[egra_columns])
+    reliability_egra_dutch = item_reliability(df_egra_dutch[egra_columns])
+    reliability_egma = item_reliability(df[egma_columns])
+    
+    alpha_egra_english, standardized_egra_english = cronbach_alpha(reliability_egra_english)
+    alpha_egra_dutch, standardized_egra_dutch = cronbach_alpha(reliability_egra_dutch)
+    alpha_egma, standardized_egma = cronbach_alpha(reliability_egma)
+    
+    # Intervalles de confiance bootstrap (rééchantillonnage vectorisé, graine fixe)
+    interval_label = f"IC {BOOTSTRAP_CONFIDENCE:.0%} (bootstrap)"
+    with st.spinner(f"Calcul des intervalles de confiance ({BOOTSTRAP_REPLICATES} réplications bootstrap)..."):
+        interval_egra_english = alpha_interval(df, "EGRA English", df_egra_english[egra_columns])
+        interval_egra_dutch = alpha_interval(df, "EGRA Dutch", df_egra_dutch[egra_columns])
+        interval_egma = alpha_interval(df, "EGMA", df[egma_columns])
     
     # Création du DataFrame des résultats
     alpha_data = {
         "Test": ["EGRA English", "EGRA Dutch", "EGMA Mathématiques"],
         "Cronbach Alpha": [alpha_egra_english, alpha_egra_dutch, alpha_egma],
+        "Alpha standardisé": [standardized_egra_english, standardized_egra_dutch, standardized_egma],
+        interval_label: [
+            format_interval(interval_egra_english),
+            format_interval(interval_egra_dutch),
+            format_interval(interval_egma)
+        ],
         "Fiabilité": [
             interpret_alpha(alpha_egra_english),
             interpret_alpha(alpha_egra_dutch),
@@ -116,9 +176,10 @@ def show_cronbach(df):
     st.subheader("📊 Résultats du coefficient de Cronbach Alpha")
     
     # Formatage des valeurs alpha
-    alpha_df["Cronbach Alpha"] = alpha_df["Cronbach Alpha"].apply(
-        lambda x: f"{x:.3f}" if x is not None else "N/A"
-    )
+    for column in ["Cronbach Alpha", "Alpha standardisé"]:
+        alpha_df[column] = alpha_df[column].apply(
+            lambda x: f"{x:.3f}" if x is not None else "N/A"
+        )
     
     # Affichage stylisé du tableau
     st.dataframe(
@@ -127,10 +188,68 @@ def show_cronbach(df):
         column_config={
             "Test": st.column_config.Column("Test", width="medium"),
             "Cronbach Alpha": st.column_config.Column("Cronbach Alpha", width="small"),
+            "Alpha standardisé": st.column_config.Column("Alpha standardisé", width="small"),
+            interval_label: st.column_config.Column(interval_label, width="small"),
             "Fiabilité": st.column_config.Column("Fiabilité", width="medium")
         }
     )
     
+    # Statistiques par item
+    st.subheader("🔍 Statistiques par item")
+    st.markdown(
+        "Un item dont la suppression augmente l'alpha, ou dont la corrélation avec le reste "
+        "du test est faible (< 0.3), mérite d'être réexaminé."
+    )
+    item_tables = {
+        "EGRA English": item_table(reliability_egra_english),
+        "EGRA Dutch": item_table(reliability_egra_dutch),
+        "EGMA Mathématiques": item_table(reliability_egma)
+    }
+    for tab, (test, table) in zip(st.tabs(list(item_tables.keys())), item_tables.items()):
+        with tab:
+            if table.empty:
+                st.info(f"Données insuffisantes pour {test}.")
+            else:
+                st.dataframe(table, hide_index=True)
+    
+    # Fiabilité par sous-groupe
+    st.subheader("🏫 Fiabilité par sous-groupe")
+    subgroup = st.selectbox("Découper par :", list(subgroup_columns.keys()))
+    group_column = subgroup_columns[subgroup]
+    
+    if group_column not in df.columns:
+        st.info(f"La variable « {subgroup} » n'est pas disponible dans les données.")
+    else:
+        if group_column == "stgender":
+            # Libellés Fille / Garçon plutôt que les codes 0 / 1
+            df_groups = df.assign(stgender=derived_features(df)["gender"])
+        else:
+            df_groups = df
+        group_alphas, group_sizes = grouped_alpha(df_groups, group_column, subgroup_tests)
+        
+        subgroup_data = {subgroup: group_alphas.index.astype(str)}
+        for test in subgroup_tests:
+            subgroup_data[f"Alpha {test}"] = group_alphas[test].round(3).to_numpy()
+            subgroup_data[f"Effectif {test}"] = group_sizes[test].to_numpy()
+        subgroup_df = pd.DataFrame(subgroup_data)
+        
+        # Les groupes les moins fiables en premier (alpha le plus faible, tous tests
+        # confondus) : tests potentiellement mal administrés
+        order = np.argsort(group_alphas.min(axis=1).fillna(np.inf).to_numpy(), kind="stable")
+        subgroup_df = subgroup_df.iloc[order]
+        low_alpha = (group_alphas < 0.6).any(axis=1).sum()
+        st.markdown(f"**{low_alpha}** groupe(s) sur {len(subgroup_df)} ont au moins un test avec α < 0.6.")
+        st.dataframe(subgroup_df, hide_index=True)
+        
+        csv = subgroup_df.to_csv(index=False).encode('utf-8-sig')
+        st.download_button(
+            "📥 Télécharger la fiabilité par sous-groupe en CSV",
+            csv,
+            "cronbach_alpha_sous_groupes.csv",
+            "text/csv",
+            key='download-cronbach-groups-csv'
+        )
+    
     # Export des résultats
     col1, col2 = st.columns(2)
     
@@ -148,7 +267,7 @@ def show_cronbach(df):
     # Export Word
     with col2:
         if st.button("📄 Exporter en Word"):
-            doc = create_cronbach_word_report(alpha_df)
+            doc = create_cronbach_word_report(alpha_df, item_tables)
             with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp:
                 doc.save(tmp.name)
                 with open(tmp.name, 'rb') as f:
@@ -161,7 +280,7 @@ def show_cronbach(df):
                 )
             os.unlink(tmp.name)
 
-def create_cronbach_word_report(alpha_df):
+def create_cronbach_word_report(alpha_df, item_tables):
     """Crée un rapport Word avec les résultats de l'analyse de fiabilité."""
     doc = Document()
     doc.add_heading("Analyse : Fiabilité des tests (Cronbach Alpha)", level=1)
@@ -180,12 +299,12 @@ def create_cronbach_word_report(alpha_df):
     
     # Ajout des résultats
     doc.add_heading("Résultats du coefficient de Cronbach Alpha", level=2)
-    table = doc.add_table(rows=1, cols=3)
+    table = doc.add_table(rows=1, cols=len(alpha_df.columns))
     table.style = 'Table Grid'
     
     # En-têtes
     header_cells = table.rows[0].cells
-    for i, column in enumerate(["Test", "Cronbach Alpha", "Fiabilité"]):
+    for i, column in enumerate(alpha_df.columns):
         header_cells[i].text = column
     
     # Données
@@ -194,4 +313,24 @@ def create_cronbach_word_report(alpha_df):
         for i, value in enumerate(row):
             row_cells[i].text = str(value)
     
+    # Statistiques par item
+    doc.add_heading("Statistiques par item", level=2)
+    for test, item_df in item_tables.items():
+        if item_df.empty:
+            continue
+        doc.add_heading(test, level=3)
+        table = doc.add_table(rows=1, cols=len(item_df.columns))
+        table.style = 'Table Grid'
+        
+        # En-têtes
+        header_cells = table.rows[0].cells
+        for i, column in enumerate(item_df.columns):
+            header_cells[i].text = column
+        
+        # Données
+        for _, row in item_df.iterrows():
+            row_cells = table.add_row().cells
+            for i, value in enumerate(row):
+                row_cells[i].text = str(value)
+    
     return doc
\ No newline at end of file
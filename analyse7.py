@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from docx import Document
 from docx.shared import Inches
 import tempfile
 import os
 
+from derivees import derived_features
+
 # Définition des colonnes pour l'analyse des performances
 score_columns = {
     "clpm": "Lettres Correctes Par Minute",
@@ -23,14 +26,37 @@ score_columns = {
     "problems": "Résolution de Problèmes"
 }
 
-def performance_level(score, quantiles):
-    """Détermine le niveau de performance basé sur les quantiles."""
-    if score >= quantiles[0.75]:  # Meilleurs 25%
-        return "Maîtrise"
-    elif score >= quantiles[0.50]:  # Moyenne haute
-        return "Développement"
-    else:
-        return "Émergent"
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + ["school"]
+
+# Découpages des niveaux : quantiles des scores totaux moyens par école et libellés
+banding_options = {
+    "Médiane et 3e quartile": ([0.50, 0.75], ["Émergent", "Développement", "Maîtrise"]),
+    "Quartiles": ([0.25, 0.50, 0.75], ["Q1", "Q2", "Q3", "Q4"]),
+    "Déciles": ([i / 10 for i in range(1, 10)], [f"D{i}" for i in range(1, 11)]),
+    "Seuils fixes": (None, None)
+}
+
+def band_labels(edges):
+    """Construit les libellés des niveaux délimités par des seuils."""
+    labels = [f"< {edges[0]:g}"]
+    labels += [f"{low:g} – {high:g}" for low, high in zip(edges[:-1], edges[1:])]
+    labels.append(f"≥ {edges[-1]:g}")
+    return labels
+
+def band_scores(scores, edges, labels=None):
+    """Attribue un niveau à chaque score en une seule passe vectorisée.
+
+    Un score égal à un seuil passe au niveau supérieur ; un score manquant est
+    classé au niveau le plus bas. Le résultat est une catégorie ordonnée.
+    """
+    values = np.asarray(scores, dtype=float)
+    edges = np.sort(np.asarray(edges, dtype=float))
+    codes = np.searchsorted(edges, values, side="right")
+    codes[np.isnan(values)] = 0
+    if labels is None:
+        labels = band_labels(edges)
+    return pd.Categorical.from_codes(codes, categories=labels, ordered=True)
 
 def show_performance_school(df):
     """Affiche l'analyse des performances par école."""
@@ -58,20 +84,47 @@ def show_performance_school(df):
     
     selected_columns = selected_columns_left + selected_columns_right
     
+    # Découpage des niveaux de performance
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        banding = st.selectbox(
+            "Découpage des niveaux de performance :",
+            options=list(banding_options.keys())
+        )
+    
+    fixed_edges = None
+    if banding == "Seuils fixes":
+        with col2:
+            thresholds = st.text_input(
+                "Seuils du score total (séparés par des virgules) :",
+                help="Par exemple des repères nationaux : 50, 120, 200"
+            )
+        try:
+            fixed_edges = sorted(float(value) for value in thresholds.split(",") if value.strip())
+        except ValueError:
+            fixed_edges = []
+        if not fixed_edges:
+            st.warning("Veuillez saisir au moins un seuil numérique ; découpage par défaut utilisé.")
+            banding = "Médiane et 3e quartile"
+    
     if selected_columns:
         try:
             # Calcul des moyennes par école
             mean_scores_by_school = df.groupby("school")[selected_columns].mean().round(2).reset_index()
             
             # Calcul des niveaux de performance
-            df_analysis = df.copy()
-            df_analysis["total_score"] = df_analysis[selected_columns].sum(axis=1)
+            # Ajout de la colonne dérivée sans copier les données source (Copy-on-Write)
+            features = derived_features(df, selected_columns)
+            df_analysis = df.assign(total_score=features["total_score"])
             mean_total_by_school = df_analysis.groupby("school")["total_score"].mean()
             
-            quantiles = mean_total_by_school.quantile([0.50, 0.75])
-            df_analysis["performance_level"] = df_analysis["total_score"].apply(
-                lambda x: performance_level(x, quantiles)
-            )
+            quantile_levels, labels = banding_options[banding]
+            if quantile_levels is None:
+                edges = fixed_edges
+            else:
+                edges = mean_total_by_school.quantile(quantile_levels).to_numpy()
+            df_analysis["performance_level"] = band_scores(df_analysis["total_score"], edges, labels)
             
             # Affichage des moyennes par école
             st.subheader("📊 Moyenne des scores par école")
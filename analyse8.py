@@ -6,8 +6,9 @@ from docx import Document
 from docx.shared import Inches
 import tempfile
 import os
-import numpy as np
-import statsmodels.api as sm
+
+from derivees import derived_features
+from graphiques import scatter_with_trendline, trendlines
 
 # Définition des colonnes
 score_columns = {
@@ -34,20 +35,8 @@ contextual_vars = {
     "home_support": "Soutien Parental"
 }
 
-def map_language(row):
-    """Détermine le groupe linguistique basé sur les réponses."""
-    if row["st_english_home"] == "Always":
-        return "English Always"
-    elif row["st_dutch_home"] == "Always":
-        return "Dutch Always"
-    elif row["st_english_home"] in ["Frequently", "Sometimes"]:
-        return f"English {row['st_english_home']}"
-    elif row["st_dutch_home"] in ["Frequently", "Sometimes"]:
-        return f"Dutch {row['st_dutch_home']}"
-    elif row["st_other_language"] == "Yes":
-        return "Other Language"
-    else:
-        return "Other"
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + list(contextual_vars.keys())
 
 def validate_columns(df, required_columns):
     """Vérifie la présence des colonnes requises."""
@@ -82,23 +71,29 @@ def show_contextual_factors(df):
     if selected_columns:
         try:
             # Préparation des données
-            df_analysis = df.copy()
-            df_analysis["language_group"] = df_analysis.apply(map_language, axis=1)
-            df_analysis["total_score"] = df_analysis[selected_columns].sum(axis=1)
+            # Ajout des colonnes dérivées sans copier les données source (Copy-on-Write)
+            features = derived_features(df, selected_columns)
+            df_analysis = df.assign(
+                language_group=features["language_group"],
+                total_score=features["total_score"]
+            )
             
             # 1. Corrélations avec SES
             st.subheader("🔄 Relation entre SES et Scores")
             
+            # Droites de régression de tous les indicateurs en une passe vectorisée
+            ses_fits = trendlines(df_analysis, "ses", selected_columns)
+            
             for i in range(0, len(selected_columns), 2):
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     if i < len(selected_columns):
-                        fig = px.scatter(
+                        fig = scatter_with_trendline(
                             df_analysis,
                             x="ses",
                             y=selected_columns[i],
-                            trendline="ols",
+                            fit=ses_fits.loc[selected_columns[i]],
                             title=f"SES vs {score_columns[selected_columns[i]]}",
                             labels={
                                 "ses": "Statut Socio-Économique",
@@ -109,11 +104,11 @@ def show_contextual_factors(df):
                 
                 with col2:
                     if i + 1 < len(selected_columns):
-                        fig = px.scatter(
+                        fig = scatter_with_trendline(
                             df_analysis,
                             x="ses",
                             y=selected_columns[i + 1],
-                            trendline="ols",
+                            fit=ses_fits.loc[selected_columns[i + 1]],
                             title=f"SES vs {score_columns[selected_columns[i + 1]]}",
                             labels={
                                 "ses": "Statut Socio-Économique",
@@ -251,13 +246,14 @@ def create_contextual_factors_word_report(df, selected_columns, correlation_matr
     
     # Section SES
     doc.add_heading("Relations avec le Statut Socio-Économique (SES)", level=2)
+    ses_fits = trendlines(df, "ses", selected_columns)
     with tempfile.TemporaryDirectory() as tmp_dir:
         for col in selected_columns:
-            fig = px.scatter(
+            fig = scatter_with_trendline(
                 df,
                 x="ses",
                 y=col,
-                trendline="ols",
+                fit=ses_fits.loc[col],
                 title=f"SES vs {score_columns[col]}"
             )
             img_path = os.path.join(tmp_dir, f"{col}_ses_scatter.png")
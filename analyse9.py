@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import scipy.stats as stats
 from docx import Document
 from docx.shared import Inches
 import tempfile
 import os
 
+from composants import permutation_option
+from derivees import group_index
+from statistiques import kruskal_batch
+
 # Variables d'analyse
 class_practices_vars = ["teacher_experience", "teacher_training", "teaching_method", "use_of_materials"]
 score_columns = {
@@ -25,6 +28,9 @@ score_columns = {
     "problems": "Résolution de Problèmes"
 }
 
+# Colonnes chargées pour cette analyse
+required_columns = list(score_columns.keys()) + class_practices_vars
+
 def show_classroom_practices(df):
     """Affiche l'analyse des pratiques en classe."""
     
@@ -157,20 +163,48 @@ def show_classroom_practices(df):
         # 5. Tests statistiques
         st.subheader("📊 Tests Statistiques (Kruskal-Wallis)")
         
+        # Tous les scores sont classés en une passe ; les rangs servent aussi au test de Dunn
+        methods = group_index(df, "teaching_method")
+        tests, dunn = kruskal_batch(df[existing_scores], methods.codes, methods.labels)
+        
+        permutation_caption = permutation_option(
+            tests,
+            df[existing_scores],
+            methods.codes,
+            key="permutation-practices"
+        )
+        
         results_data = []
-        for col in existing_scores[:6]:
-            groups = [df[df["teaching_method"] == method][col].dropna() 
-                     for method in df["teaching_method"].unique()]
-            stat, p = stats.kruskal(*groups)
-            results_data.append({
-                "Variable": score_columns[col],
-                "Statistique": f"{stat:.3f}",
-                "p-value": f"{p:.5f}",
-                "Interprétation": "Différence significative" if p < 0.05 else "Pas de différence significative"
-            })
+        for col, test in tests.iterrows():
+            if test["dof"] > 0:
+                results_data.append({
+                    "Variable": score_columns[col],
+                    "Statistique": f"{test['H']:.3f}",
+                    "p-value": f"{test['p']:.5f}",
+                    "Interprétation": "Différence significative" if test["p"] < 0.05 else "Pas de différence significative"
+                })
         
         results_df = pd.DataFrame(results_data)
         st.dataframe(results_df, hide_index=True)
+        if permutation_caption:
+            st.caption(permutation_caption)
+        
+        # Comparaisons post-hoc entre méthodes pédagogiques
+        st.subheader("🔎 Comparaisons Post-hoc (Dunn, correction de Bonferroni)")
+        
+        dunn_data = []
+        for _, comparison in dunn.iterrows():
+            dunn_data.append({
+                "Variable": score_columns[comparison["variable"]],
+                "Méthode 1": comparison["group_1"],
+                "Méthode 2": comparison["group_2"],
+                "z": f"{comparison['z']:.3f}",
+                "p-value ajustée": f"{comparison['p_bonferroni']:.5f}",
+                "Interprétation": "Différence significative" if comparison["p_bonferroni"] < 0.05 else "Pas de différence significative"
+            })
+        
+        dunn_df = pd.DataFrame(dunn_data)
+        st.dataframe(dunn_df, hide_index=True)
         
         # Export des résultats
         col1, col2 = st.columns(2)
@@ -185,6 +219,14 @@ def show_classroom_practices(df):
                 "text/csv",
                 key='download-practices-csv'
             )
+            dunn_csv = dunn_df.to_csv(index=False).encode('utf-8-sig')
+            st.download_button(
+                "📥 Télécharger les comparaisons post-hoc en CSV",
+                dunn_csv,
+                "pratiques_classe_dunn.csv",
+                "text/csv",
+                key='download-practices-dunn-csv'
+            )
         
         # Export Word
         with col2:
@@ -192,7 +234,8 @@ def show_classroom_practices(df):
                 doc = create_classroom_practices_word_report(
                     df,
                     existing_scores[:6],
-                    results_df
+                    results_df,
+                    dunn_df
                 )
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp:
                     doc.save(tmp.name)
@@ -209,7 +252,7 @@ def show_classroom_practices(df):
     else:
         st.warning("Les colonnes nécessaires pour l'analyse ne sont pas disponibles dans les données.")
 
-def create_classroom_practices_word_report(df, score_cols, results_df):
+def create_classroom_practices_word_report(df, score_cols, results_df, dunn_df):
     """Crée un rapport Word avec les résultats de l'analyse des pratiques en classe."""
     doc = Document()
     doc.add_heading("Analyse : Pratiques en Classe", level=1)
@@ -264,4 +307,19 @@ def create_classroom_practices_word_report(df, score_cols, results_df):
         for i, value in enumerate(row):
             row_cells[i].text = str(value)
     
+    # Comparaisons post-hoc
+    doc.add_heading("Comparaisons Post-hoc (Dunn, correction de Bonferroni)", level=2)
+    table = doc.add_table(rows=1, cols=len(dunn_df.columns))
+    table.style = 'Table Grid'
+    
+    # En-têtes
+    for i, header in enumerate(dunn_df.columns):
+        table.rows[0].cells[i].text = header
+    
+    # Données
+    for _, row in dunn_df.iterrows():
+        row_cells = table.add_row().cells
+        for i, value in enumerate(row):
+            row_cells[i].text = str(value)
+    
     return doc
\ No newline at end of file
@@ -0,0 +1,707 @@
+import codecs
+import csv
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # Sans pyarrow, seul le cache en mémoire est utilisé
+    pa = None
+
+# Limites du cache en mémoire des jeux de données déjà parsés
+CACHE_MAX_ENTRIES = 8
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 Go
+
+# Jeux complets conservés en mémoire lorsque le stockage sur disque est indisponible
+MEMORY_MAX_DATASETS = 4
+
+# Encodage des CSV qui ne sont pas en UTF-8 valide (exports Excel en locale française)
+CSV_FALLBACK_ENCODING = "cp1252"
+
+# Nombre de lignes converties à la fois par la lecture en flux des classeurs
+STREAM_CHUNK_ROWS = 10_000
+
+# Schéma des colonnes utilisées par les analyses 1 à 13
+SCORE_COLUMNS = [
+    "clpm", "phoneme", "sound_word", "cwpm", "listening", "orf", "comprehension",
+    "number_id", "discrimin", "quantity", "missing_number", "addition", "subtraction", "problems"
+]
+CONTEXT_NUMERIC_COLUMNS = ["st_nb_miss_school", "st_nb_beenlate_school", "ses", "home_support", "stgender"]
+CATEGORICAL_COLUMNS = [
+    "school", "language_teaching", "st_english_home", "st_dutch_home", "st_other_language",
+    "teacher_experience", "teacher_training", "teaching_method", "use_of_materials", "source"
+]
+
+# Colonnes textuelles hors schéma converties en catégories sous ce ratio de valeurs distinctes
+CATEGORY_MAX_RATIO = 0.5
+
+# Colonne ajoutée lors de la fusion de plusieurs fichiers ou feuilles
+SOURCE_COLUMN = "source"
+
+# Dossier du stockage colonnaire sur disque (survit aux redémarrages du serveur)
+STORE_DIR = Path(os.environ.get("EDUVIZ_CACHE_DIR", Path.home() / ".cache" / "eduviz"))
+STORE_MAX_BYTES = 20 * 1024 ** 3  # 20 Go ; au-delà, les fichiers les moins récemment lus sont supprimés
+
+# Version du format des fichiers enregistrés (parsing, compaction des types, attributs) :
+# à incrémenter à chaque modification, les fichiers des versions précédentes sont ignorés
+STORE_FORMAT_VERSION = 1
+
+def content_hash(data):
+    """Calcule l'empreinte SHA-256 du contenu d'un fichier."""
+    return hashlib.sha256(data).hexdigest()
+
+def frame_nbytes(df):
+    """Retourne l'empreinte mémoire d'un DataFrame (ou d'une Series) en octets."""
+    if not hasattr(df, "memory_usage"):
+        # Autres objets mis en cache (index de groupes) : taille exposée par `nbytes`
+        return int(df.nbytes)
+    return int(np.sum(df.memory_usage(index=True, deep=True)))
+
+class DatasetCache:
+    """Cache LRU des DataFrames parsés, borné en nombre d'entrées et en mémoire."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """Mémoire totale occupée par les entrées du cache."""
+        return self._nbytes
+
+    def get(self, key):
+        """Retourne l'entrée associée à la clé (ou None) et la marque comme récente."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, df):
+        """Ajoute une entrée puis évince les moins récentes au-delà du budget."""
+        size = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:  # Trop volumineux pour être conservé
+                return
+            self._entries[key] = (df, size)
+            self._nbytes += size
+            while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_size
+
+    def clear(self):
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+# Cache partagé par toutes les sessions du processus Streamlit
+dataset_cache = DatasetCache()
+
+# Jeux complets sans copie sur disque : hors du cache des projections, qui ne peut
+# donc pas les évincer ; seul le nombre de jeux conservés est borné
+memory_datasets = DatasetCache(max_entries=MEMORY_MAX_DATASETS, max_bytes=float("inf"))
+
+class DatasetStore:
+    """Stockage colonnaire Arrow IPC des jeux de données, indexé par empreinte du contenu."""
+
+    def __init__(self, directory=STORE_DIR, max_bytes=STORE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @property
+    def available(self):
+        """Indique si le stockage sur disque est utilisable (pyarrow installé)."""
+        return pa is not None
+
+    def path(self, key):
+        """Chemin du fichier Arrow associé à une empreinte, pour la version courante du format."""
+        return self.directory / f"{key}.v{STORE_FORMAT_VERSION}.arrow"
+
+    def __contains__(self, key):
+        return self.available and self.path(key).exists()
+
+    def schema(self, key):
+        """Schéma Arrow du fichier, lu sans charger les données."""
+        with pa.memory_map(str(self.path(key))) as source:
+            return pa.ipc.open_file(source).schema
+
+    def columns(self, key):
+        """Noms des colonnes enregistrées."""
+        return self.schema(key).names
+
+    def attrs(self, key):
+        """Attributs (df.attrs) enregistrés avec le jeu de données."""
+        metadata = self.schema(key).pandas_metadata or {}
+        return metadata.get("attributes", {})
+
+    def read(self, key, columns=None):
+        """Charge un jeu de données (ou certaines colonnes) par projection mémoire du fichier Arrow."""
+        # Fichier non compressé : les colonnes numériques sans valeurs manquantes
+        # sont lues sans copie depuis la projection mémoire
+        table = feather.read_table(self.path(key), columns=columns, memory_map=True)
+        self._touch(key)
+        return table.to_pandas(split_blocks=True)
+
+    def _touch(self, key):
+        """Marque le fichier comme récemment utilisé (date de modification) pour l'éviction."""
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def prune(self, keep=None):
+        """Supprime les fichiers les moins récemment utilisés au-delà de `max_bytes` (sauf `keep`).
+
+        Les fichiers d'une autre version du format, qui ne sont jamais relus, sont supprimés d'office.
+        """
+        suffix = f".v{STORE_FORMAT_VERSION}.arrow"
+        try:
+            paths = list(self.directory.glob("*.arrow"))
+        except OSError:
+            return
+        files = []
+        for path in paths:
+            try:
+                if path.name.endswith(suffix):
+                    stat = path.stat()
+                    files.append((stat.st_mtime, stat.st_size, path))
+                else:
+                    path.unlink()
+            except OSError:
+                pass
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == self.path(keep):
+                continue
+            try:
+                # Un lecteur qui projette déjà le fichier en mémoire garde ses données
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def write(self, key, df):
+        """Enregistre un jeu de données ; retourne False s'il ne peut pas être converti."""
+        if not self.available:
+            return False
+        tmp_path = self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            feather.write_feather(df, tmp_path, compression="uncompressed")
+            # Remplacement atomique : un lecteur concurrent ne voit jamais de fichier partiel
+            os.replace(tmp_path, self.path(key))
+        except (pa.ArrowException, TypeError, ValueError, OSError):
+            # Colonnes de types mixtes ou disque indisponible : on garde le cache en mémoire
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return False
+        self.prune(keep=key)
+        return True
+
+dataset_store = DatasetStore()
+
+def _excel_input(data):
+    """Source lisible par pandas et openpyxl : contenu brut ou chemin d'un classeur sur disque."""
+    return data if isinstance(data, (str, Path)) else BytesIO(data)
+
+def parse_excel(data, sheet_name="Sheet1"):
+    """Parse un classeur Excel (contenu brut ou chemin)."""
+    return pd.read_excel(_excel_input(data), sheet_name=sheet_name)
+
+def _header_names(header):
+    """Nomme les colonnes comme pandas (cellules vides et doublons)."""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _column_buffer(values):
+    """Convertit les valeurs d'une colonne d'un bloc en Series typée."""
+    series = pd.Series(values)
+    if series.isna().all():
+        # Bloc vide : float64 pour ne pas forcer la colonne entière en object
+        return pd.Series(np.nan, index=series.index)
+    return series
+
+def stream_excel(data, sheet_name="Sheet1", chunk_rows=STREAM_CHUNK_ROWS, progress=None):
+    """Lit une feuille .xlsx en flux, bloc par bloc, dans des colonnes typées.
+
+    Seul un bloc de lignes existe à la fois sous forme d'objets Python, et les
+    colonnes assemblées sont reprises sans copie par le DataFrame final.
+    `progress` est appelé avec (lignes lues, lignes attendues ou None) après chaque bloc.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(_excel_input(data), read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        total_rows = sheet.max_row - 1 if sheet.max_row else None
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = _header_names(header)
+        width = len(columns)
+        buffers = [[] for _ in columns]
+        rows_read = 0
+        block = []
+
+        def flush():
+            for j, values in enumerate(zip(*block)):
+                buffers[j].append(_column_buffer(values))
+
+        for row in rows:
+            if all(value is None for value in row):  # Lignes vides ignorées, comme pandas
+                continue
+            if len(row) != width:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+            block.append(row)
+            if len(block) >= chunk_rows:
+                flush()
+                rows_read += len(block)
+                block = []
+                if progress is not None:
+                    progress(rows_read, total_rows)
+        if block:
+            flush()
+            rows_read += len(block)
+        if progress is not None:
+            progress(rows_read, rows_read)
+    finally:
+        workbook.close()
+
+    if rows_read == 0:
+        return pd.DataFrame(columns=columns)
+    # Assemblage colonne par colonne, en libérant les blocs au fur et à mesure
+    data_columns = {}
+    for name, chunks in zip(columns, buffers):
+        data_columns[name] = pd.concat(chunks, ignore_index=True)
+        chunks.clear()
+    # copy=False : les colonnes concaténées sont reprises telles quelles, sans seconde copie
+    return pd.DataFrame(data_columns, columns=columns, copy=False)
+
+def detect_format(data, filename=None):
+    """Détecte le format d'un fichier d'après ses premiers octets, puis son extension."""
+    if data[:4] == b"PAR1":
+        return "parquet"
+    if data[:6] == b"ARROW1" or data[:4] == b"FEA1":
+        return "feather"
+    if data[:4] == b"PK\x03\x04":
+        return "xlsx"
+    if data[:4] == b"\xd0\xcf\x11\xe0":
+        return "xls"
+    suffix = Path(filename).suffix.lower() if filename else ""
+    if suffix in (".csv", ".txt", ".tsv"):
+        return "csv"
+    return "excel"  # Format inconnu : on laisse pandas tenter la lecture Excel
+
+def _sniff_delimiter(data):
+    """Devine le séparateur d'un CSV (virgule, point-virgule ou tabulation)."""
+    sample = data[:65536].decode("utf-8", errors="ignore")
+    if "\n" in sample:  # Ne garder que des lignes complètes
+        sample = sample[:sample.rfind("\n")]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+def _csv_encoding(data, chunk_size=1 << 20):
+    """Retourne l'encodage d'un CSV : UTF-8 s'il est valide, sinon CSV_FALLBACK_ENCODING.
+
+    La validation se fait par morceaux, sans copie décodée du fichier entier.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for start in range(0, len(data), chunk_size):
+            decoder.decode(data[start:start + chunk_size])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return CSV_FALLBACK_ENCODING
+    return "utf-8"
+
+def parse_csv(data):
+    """Parse un CSV, en multi-thread avec pyarrow lorsqu'il est disponible."""
+    delimiter = _sniff_delimiter(data)
+    # pyarrow ne signale pas l'UTF-8 invalide (il infère des colonnes binaires) :
+    # l'encodage est donc déterminé avant la lecture
+    encoding = _csv_encoding(data)
+    if pa is not None:
+        try:
+            table = pa_csv.read_csv(
+                pa.BufferReader(data),
+                read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding),
+                parse_options=pa_csv.ParseOptions(delimiter=delimiter)
+            )
+            return table.to_pandas()
+        except pa.ArrowInvalid:
+            # Lignes incomplètes ou type changeant en cours de fichier : l'analyseur de pandas est plus tolérant
+            pass
+    return pd.read_csv(BytesIO(data), sep=delimiter, encoding=encoding)
+
+def parse_columnar(data, file_format):
+    """Parse un fichier Parquet ou Feather/Arrow IPC."""
+    if pa is None:
+        raise ImportError("pyarrow est requis pour lire les fichiers Parquet et Feather.")
+    if file_format == "parquet":
+        table = pq.read_table(pa.BufferReader(data), use_threads=True)
+    else:
+        table = feather.read_table(pa.BufferReader(data))
+    return table.to_pandas()
+
+def parse_dataset(data, filename=None, progress=None):
+    """Parse un fichier de données avec le lecteur le plus rapide pour son format."""
+    file_format = detect_format(data, filename)
+    if file_format == "xlsx":
+        return stream_excel(data, progress=progress)
+    if file_format == "csv":
+        return parse_csv(data)
+    if file_format in ("parquet", "feather"):
+        return parse_columnar(data, file_format)
+    # Anciens classeurs .xls et formats non reconnus : lecture complète par pandas
+    return parse_excel(data)
+
+def _compact_numeric(series):
+    """Réduit un type numérique sans perte : entiers au plus petit type, flottants entiers en float32."""
+    if series.dtype.kind in "iu":
+        return pd.to_numeric(series, downcast="integer")
+    if series.dtype.kind != "f":
+        return series
+    values = series.to_numpy()
+    missing = np.isnan(values)
+    present = values[~missing]
+    if present.size == 0 or not np.all(np.isfinite(present)) or not np.all(present == np.round(present)):
+        return series  # Valeurs décimales : float64 conservé pour la précision des statistiques
+    if not missing.any():
+        return pd.to_numeric(series, downcast="integer")
+    if np.abs(present).max() < 2 ** 24:  # Entiers représentés exactement en float32
+        return series.astype(np.float32)
+    return series
+
+def compact_dtypes(df):
+    """Applique le schéma des analyses : scores et contexte numériques, catégories pour le texte, types réduits."""
+    before = frame_nbytes(df)
+    columns = {}
+    numeric_schema = set(SCORE_COLUMNS) | set(CONTEXT_NUMERIC_COLUMNS)
+    for name in df.columns:
+        series = df[name]
+        is_text = series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+        if name in numeric_schema and (is_text or isinstance(series.dtype, pd.CategoricalDtype)):
+            # Score ou variable de contexte lu comme texte à cause de quelques cellules
+            # non numériques (« abs », « - ») : ces cellules deviennent NaN
+            columns[name] = _compact_numeric(pd.to_numeric(series.astype(object), errors="coerce"))
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            columns[name] = series
+        elif is_text:
+            if name in CATEGORICAL_COLUMNS or series.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(series):
+                columns[name] = series.astype("category")
+            else:
+                columns[name] = series
+        elif pd.api.types.is_numeric_dtype(series.dtype) and series.dtype != bool:
+            columns[name] = _compact_numeric(series)
+        else:
+            columns[name] = series
+    compacted = pd.DataFrame(columns, index=df.index)
+    compacted.attrs["memory_usage"] = {"before": before, "after": frame_nbytes(compacted)}
+    return compacted
+
+def _store_dataset(key, df):
+    """Compacte puis enregistre un jeu de données parsé sous son empreinte."""
+    df = compact_dtypes(df)
+    df.attrs["dataset_key"] = key  # Transmis aux projections pour les variables dérivées
+    if not dataset_store.write(key, df):
+        # Sans stockage sur disque, le jeu complet reste en mémoire pour les projections
+        memory_datasets.put(key, df)
+    if not is_ingested(key):
+        raise RuntimeError("Le jeu de données n'a pas pu être conservé, ni sur disque ni en mémoire.")
+
+def is_ingested(key):
+    """Indique si le jeu de données est déjà disponible (mémoire ou disque)."""
+    return key in memory_datasets or key in dataset_store
+
+def ingest_dataset(data, filename=None, progress=None):
+    """Rend un jeu de données disponible et retourne son empreinte ; le fichier n'est parsé qu'une fois."""
+    key = content_hash(data)
+    if is_ingested(key):
+        return key
+    _store_dataset(key, parse_dataset(data, filename, progress=progress))
+    return key
+
+def list_sheets(data):
+    """Retourne les noms des feuilles d'un classeur Excel."""
+    if detect_format(data) == "xlsx":
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(BytesIO(data), read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    return pd.ExcelFile(BytesIO(data)).sheet_names
+
+def _parse_sources(data, filename, sheet_names, file_format):
+    """Parse un fichier, ou plusieurs feuilles d'un même classeur (exécuté dans un processus de travail).
+
+    `data` est le contenu du fichier ou, pour les feuilles, le chemin d'une copie
+    temporaire du classeur : le processus ouvre le fichier une fois pour toutes ses
+    feuilles. Retourne la liste des DataFrames, dans l'ordre de `sheet_names`.
+    """
+    if sheet_names is None:
+        return [parse_dataset(data, filename)]
+    if file_format == "xlsx":
+        return [stream_excel(data, sheet_name=sheet) for sheet in sheet_names]
+    return [parse_excel(data, sheet_name=sheet) for sheet in sheet_names]
+
+def merge_sources(frames):
+    """Aligne les schémas de plusieurs sources et les concatène avec une colonne de provenance."""
+    aligned = []
+    for source, df in frames:
+        if df.empty:
+            continue
+        # Catégories ramenées au texte : les modalités diffèrent d'une source à l'autre
+        df = df.astype({
+            name: object for name, dtype in df.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+        })
+        df[SOURCE_COLUMN] = source
+        aligned.append(df)
+    if not aligned:
+        return pd.DataFrame()
+    # Union des colonnes dans l'ordre d'apparition ; les colonnes absentes d'une source valent NaN
+    return pd.concat(aligned, ignore_index=True, sort=False)
+
+def sources_key(files, all_sheets=False):
+    """Empreinte d'une fusion de fichiers : noms, contenus, ordre et mode de lecture des feuilles.
+
+    Les noms font partie de l'empreinte car ils sont écrits dans la colonne de provenance.
+    """
+    file_hashes = "".join(f"{filename}:{content_hash(data)};" for filename, data in files)
+    return content_hash(f"{file_hashes}:all_sheets={all_sheets}".encode())
+
+def ingest_sources(files, all_sheets=False, progress=None):
+    """Ingère plusieurs fichiers (et toutes leurs feuilles si demandé) en un seul jeu de données.
+
+    `files` est une liste de couples (nom du fichier, contenu). Les fichiers et
+    feuilles sont parsés en parallèle dans un pool de processus, puis fusionnés ;
+    les classeurs lus feuille par feuille transitent par un fichier temporaire
+    plutôt que d'être copiés vers chaque processus.
+    """
+    key = sources_key(files, all_sheets)
+    if is_ingested(key):
+        return key
+
+    sources = []
+    for filename, data in files:
+        file_format = detect_format(data, filename)
+        if all_sheets and file_format in ("xlsx", "xls"):
+            sources.append((filename, data, file_format, list_sheets(data)))
+        else:
+            sources.append((filename, data, file_format, None))
+    num_sources = sum(1 if sheets is None else len(sheets) for _, _, _, sheets in sources)
+    workers = min(num_sources, os.cpu_count() or 1)
+
+    frames = []
+    if workers < 2:
+        rows_read = 0
+        for filename, data, file_format, sheets in sources:
+            names = [filename] if sheets is None else [f"{filename} / {sheet}" for sheet in sheets]
+            frames.extend(zip(names, _parse_sources(data, filename, sheets, file_format)))
+            rows_read += sum(len(df) for _, df in frames[-len(names):])
+            if progress is not None:
+                progress(rows_read, round(rows_read * num_sources / len(frames)))
+        _store_dataset(key, merge_sources(frames))
+        return key
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Tâches : (positions dans la fusion, données, nom du fichier, feuilles, format)
+        tasks = []
+        names = []
+        for i, (filename, data, file_format, sheets) in enumerate(sources):
+            if sheets is None:
+                tasks.append(([len(names)], data, filename, None, file_format))
+                names.append(filename)
+                continue
+            # Classeur écrit une seule fois sur disque ; ses feuilles sont réparties en
+            # au plus `workers` groupes, chacun lu par un seul processus
+            path = os.path.join(tmp_dir, f"{i}.{file_format}")
+            with open(path, "wb") as f:
+                f.write(data)
+            positions = list(range(len(names), len(names) + len(sheets)))
+            names.extend(f"{filename} / {sheet}" for sheet in sheets)
+            groups = min(len(sheets), workers)
+            for g in range(groups):
+                tasks.append((positions[g::groups], path, filename, sheets[g::groups], file_format))
+
+        frames = [None] * len(names)
+        rows_read = 0
+        done = 0
+        # « spawn » : le processus Streamlit est multi-thread, fork n'y est pas sûr
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(_parse_sources, data, filename, sheets, file_format): positions
+                for positions, data, filename, sheets, file_format in tasks
+            }
+            for future in as_completed(futures):
+                positions = futures[future]
+                for i, df in zip(positions, future.result()):
+                    frames[i] = (names[i], df)
+                    rows_read += len(df)
+                done += len(positions)
+                if progress is not None:
+                    # Total estimé d'après la taille moyenne des sources déjà lues
+                    progress(rows_read, round(rows_read * len(names) / done))
+
+    _store_dataset(key, merge_sources(frames))
+    return key
+
+class IngestJob:
+    """Ingestion exécutée sur un thread de travail et interrogée à chaque rerun de Streamlit."""
+
+    def __init__(self, key, target=None, args=(), kwargs=None):
+        self.key = key
+        self.rows_read = 0
+        self.total_rows = None
+        self.error = None
+        self.started = time.monotonic()
+        self.finished = None
+        if target is None:  # Jeu de données déjà disponible
+            self.finished = self.started
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(target, args, kwargs or {}), daemon=True
+        )
+        self._thread.start()
+
+    def _progress(self, rows_read, total_rows):
+        self.rows_read = rows_read
+        self.total_rows = total_rows
+
+    def _run(self, target, args, kwargs):
+        try:
+            target(*args, progress=self._progress, **kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = time.monotonic()
+
+    @property
+    def done(self):
+        """Indique si l'ingestion est terminée (avec ou sans erreur)."""
+        return self.finished is not None
+
+    @property
+    def elapsed(self):
+        """Durée écoulée depuis le début de l'ingestion, en secondes."""
+        return (self.finished or time.monotonic()) - self.started
+
+# Ingestions en cours, partagées entre les sessions qui importent le même contenu
+_ingest_jobs = {}
+_ingest_jobs_lock = threading.Lock()
+
+def _submit(key, target, args, kwargs=None):
+    """Retourne l'ingestion associée à la clé, en la démarrant si nécessaire."""
+    with _ingest_jobs_lock:
+        job = _ingest_jobs.get(key)
+        if job is not None:
+            if job.done:
+                # Résultat transmis une seule fois : une erreur pourra être retentée
+                del _ingest_jobs[key]
+            return job
+        if is_ingested(key):
+            return IngestJob(key)
+        job = IngestJob(key, target, args, kwargs)
+        _ingest_jobs[key] = job
+        return job
+
+def submit_dataset(data, filename=None):
+    """Lance en arrière-plan l'ingestion d'un fichier et retourne son IngestJob."""
+    return _submit(content_hash(data), ingest_dataset, (data, filename))
+
+def submit_sources(files, all_sheets=False):
+    """Lance en arrière-plan l'ingestion fusionnée de plusieurs fichiers et retourne son IngestJob."""
+    return _submit(sources_key(files, all_sheets), ingest_sources, (files,), {"all_sheets": all_sheets})
+
+def dataset_attrs(key):
+    """Retourne les attributs d'un jeu de données ingéré (empreinte mémoire, etc.)."""
+    full = memory_datasets.get(key)
+    if full is not None:
+        return full.attrs
+    return dataset_store.attrs(key)
+
+def numeric_columns(key):
+    """Noms des colonnes numériques d'un jeu de données ingéré, sans en charger les données."""
+    full = memory_datasets.get(key)
+    if full is not None:
+        return list(full.select_dtypes(include="number").columns)
+    # Lecture du seul schéma Arrow
+    return [
+        field.name for field in dataset_store.schema(key)
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    ]
+
+def load_columns(key, columns=None):
+    """Retourne uniquement les colonnes demandées (toutes si None) d'un jeu de données ingéré.
+
+    Les colonnes absentes du fichier sont ignorées : chaque analyse gère déjà leur absence.
+    """
+    full = memory_datasets.get(key)
+    if full is not None and columns is None:
+        return full
+    if full is None and key not in dataset_store:
+        raise LookupError("Jeu de données introuvable (évincé de la mémoire) : importez à nouveau le fichier.")
+    cache_key = (key, None if columns is None else tuple(columns))
+    df = dataset_cache.get(cache_key)
+    if df is not None:
+        return df
+    available = list(full.columns) if full is not None else dataset_store.columns(key)
+    selected = available if columns is None else [col for col in dict.fromkeys(columns) if col in available]
+    if full is not None:
+        df = full[selected]
+    elif not selected:
+        df = pd.DataFrame()
+    else:
+        # Lecture des seules colonnes utiles depuis le fichier Arrow projeté en mémoire
+        df = dataset_store.read(key, columns=selected)
+    dataset_cache.put(cache_key, df)
+    return df
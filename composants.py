@@ -0,0 +1,23 @@
+import streamlit as st
+
+from permutations import PERMUTATION_MAX, permutation_test
+
+def permutation_option(tests, values, codes, key):
+    """Propose le test par permutation et remplace, s'il est choisi, la colonne "p" de `tests`.
+
+    `values` et `codes` sont transmis à `permutation_test`. Retourne la légende à
+    afficher sous le tableau des résultats, ou None si l'option n'est pas cochée.
+    """
+    # p-values par permutation : plus fiables pour les petits effectifs et les nombreux ex-aequo
+    use_permutation = st.checkbox(
+        "Test par permutation (recommandé pour les petits effectifs ou les scores très ex-aequo)",
+        key=key
+    )
+    if not use_permutation:
+        return None
+    with st.spinner("Tests par permutation en cours..."):
+        tests["p"] = permutation_test(values, codes)["p"]
+    return (
+        f"p-values estimées par permutation (jusqu'à {PERMUTATION_MAX} permutations, "
+        "arrêt anticipé dès que la conclusion au seuil de 5 % est acquise)."
+    )
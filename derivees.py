@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from chargement import DatasetCache
+from statistiques import group_codes
+
+# Groupes linguistiques (ordre alphabétique, comme le tri d'un groupby sur du texte)
+LANGUAGE_GROUPS = [
+    "Dutch Always", "Dutch Frequently", "Dutch Sometimes",
+    "English Always", "English Frequently", "English Sometimes",
+    "Other", "Other Language"
+]
+
+# Libellés du genre (stgender : 1 = garçon, 0 = fille), ordre alphabétique
+GENDER_LABELS = ["Fille", "Garçon", "Inconnu"]
+
+# Colonnes nécessaires au calcul du groupe linguistique
+LANGUAGE_COLUMNS = ["st_english_home", "st_dutch_home", "st_other_language"]
+
+# Variables dérivées déjà calculées, par empreinte de jeu de données
+derived_cache = DatasetCache(max_entries=64, max_bytes=512 * 1024 ** 2)
+
+def _matches(series, value):
+    """Compare une colonne à une modalité via les codes catégoriels (NaN → False)."""
+    categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+    # Table de correspondance modalité → booléen ; le code -1 (NaN) pointe sur le False final
+    lookup = np.append(np.asarray(categorical.cat.categories == value), False)
+    return lookup[categorical.cat.codes.to_numpy()]
+
+def cached(df, name, compute):
+    """Retourne une variable dérivée, calculée une seule fois par jeu de données."""
+    dataset_key = df.attrs.get("dataset_key")
+    if dataset_key is None:
+        return compute(df)
+    cache_key = (dataset_key, name)
+    result = derived_cache.get(cache_key)
+    if result is None:
+        result = compute(df)
+        derived_cache.put(cache_key, result)
+    return result
+
+def classify_language(df):
+    """Détermine le groupe linguistique de chaque élève en une passe vectorisée."""
+    english, dutch = df["st_english_home"], df["st_dutch_home"]
+    # Règles évaluées dans l'ordre : la première condition vraie l'emporte
+    conditions = [
+        _matches(english, "Always"),
+        _matches(dutch, "Always"),
+        _matches(english, "Frequently"),
+        _matches(english, "Sometimes"),
+        _matches(dutch, "Frequently"),
+        _matches(dutch, "Sometimes"),
+        _matches(df["st_other_language"], "Yes"),
+    ]
+    choices = [
+        LANGUAGE_GROUPS.index(group) for group in [
+            "English Always", "Dutch Always", "English Frequently", "English Sometimes",
+            "Dutch Frequently", "Dutch Sometimes", "Other Language"
+        ]
+    ]
+    codes = np.select(conditions, choices, default=LANGUAGE_GROUPS.index("Other"))
+    groups = pd.Categorical.from_codes(codes, categories=LANGUAGE_GROUPS)
+    # Seuls les groupes présents sont conservés (tableaux et graphiques sans groupes vides)
+    return pd.Series(groups, index=df.index, name="language_group").cat.remove_unused_categories()
+
+def language_groups(df):
+    """Groupe linguistique de chaque élève, partagé par les analyses 4 et 8."""
+    return cached(df, "language_group", classify_language)
+
+def classify_gender(df):
+    """Libellé du genre de chaque élève ; toute autre valeur de stgender devient « Inconnu »."""
+    gender = df["stgender"].to_numpy()
+    codes = np.select(
+        [gender == 0, gender == 1],
+        [GENDER_LABELS.index("Fille"), GENDER_LABELS.index("Garçon")],
+        default=GENDER_LABELS.index("Inconnu")
+    )
+    groups = pd.Categorical.from_codes(codes, categories=GENDER_LABELS)
+    return pd.Series(groups, index=df.index, name="gender").cat.remove_unused_categories()
+
+def genders(df):
+    """Genre de chaque élève, partagé par les analyses."""
+    return cached(df, "gender", classify_gender)
+
+def total_scores(df, score_columns):
+    """Score total de chaque élève sur les indicateurs sélectionnés."""
+    columns = sorted(score_columns)
+    return cached(
+        df,
+        ("total_score", tuple(columns)),
+        lambda data: data[columns].sum(axis=1).rename("total_score")
+    )
+
+class GroupIndex:
+    """Positions des lignes de chaque modalité d'une variable catégorielle.
+
+    Construit une seule fois par jeu de données : extraire un sous-groupe devient
+    un simple `take` au lieu d'une comparaison sur toute la colonne.
+    """
+
+    def __init__(self, groups):
+        self.codes, self.labels = group_codes(groups)
+        codes = self.codes
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        # Les lignes sans modalité (code -1) sont en tête et ignorées
+        bounds = np.searchsorted(sorted_codes, np.arange(len(self.labels) + 1))
+        self._order = order
+        self._bounds = bounds
+
+    def __contains__(self, label):
+        return label in self.labels
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self._order.nbytes + self._bounds.nbytes
+
+    def positions(self, label):
+        """Positions (entiers) des lignes de la modalité ; vide si elle est absente."""
+        if label not in self.labels:
+            return self._order[:0]
+        code = self.labels.get_loc(label)
+        return self._order[self._bounds[code]:self._bounds[code + 1]]
+
+    def subset_codes(self, labels):
+        """Codes 0, 1, … des lignes des modalités `labels` (dans cet ordre), -1 pour les autres."""
+        # La dernière case reçoit le code -1 des lignes sans modalité
+        lookup = np.full(len(self.labels) + 1, -1)
+        for code, label in enumerate(labels):
+            if label in self.labels:
+                lookup[self.labels.get_loc(label)] = code
+        return lookup[self.codes]
+
+    def take(self, data, label):
+        """Sous-ensemble de `data` (DataFrame ou Series aligné) pour une modalité."""
+        return data.take(self.positions(label))
+
+def group_index(df, column):
+    """Index des sous-groupes d'une colonne, partagé par les analyses."""
+    return cached(df, ("group_index", column), lambda data: GroupIndex(data[column]))
+
+def derived_features(df, score_columns=None):
+    """Variables dérivées disponibles pour ce jeu de données, calculées une seule fois.
+
+    Retourne un DataFrame aligné sur `df` avec `language_group`, `gender` et
+    `total_score` (si `score_columns` est fourni), selon les colonnes présentes.
+    """
+    features = {}
+    if all(col in df.columns for col in LANGUAGE_COLUMNS):
+        features["language_group"] = language_groups(df)
+    if "stgender" in df.columns:
+        features["gender"] = genders(df)
+    if score_columns:
+        features["total_score"] = total_scores(df, score_columns)
+    return pd.DataFrame(features, index=df.index)
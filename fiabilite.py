@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+from parallele import seeded_batches
+from statistiques import group_codes
+
+# Paramètres du bootstrap de l'alpha de Cronbach
+BOOTSTRAP_REPLICATES = 2000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 20240901  # graine fixe : intervalles reproductibles d'une exécution à l'autre
+
+# Taille d'un lot de réplications (réplications × élèves), qui borne la mémoire des
+# matrices d'effectifs ; en dessous de BOOTSTRAP_PARALLEL_MIN tirages, pas de pool
+BOOTSTRAP_BATCH_ELEMENTS = 4_000_000
+BOOTSTRAP_PARALLEL_MIN = 20_000_000
+
+def alpha_features(items):
+    """Caractéristiques par élève dont les sommes pondérées suffisent à calculer l'alpha.
+
+    Colonnes : items centrés, leurs carrés, score total centré et son carré.
+    """
+    centered = items - items.mean(axis=0)
+    total = centered.sum(axis=1)
+    return np.column_stack([centered, centered ** 2, total, total ** 2])
+
+def alpha_from_moments(moments, n):
+    """Alpha de Cronbach à partir des sommes (pondérées) des caractéristiques de `alpha_features`.
+
+    `moments` a une ligne par échantillon ; `n` est le nombre d'élèves (commun ou par échantillon).
+    """
+    num_items = (moments.shape[-1] - 2) // 2
+    sums, squares = moments[..., :num_items], moments[..., num_items:2 * num_items]
+    total, total_squares = moments[..., -2], moments[..., -1]
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        item_variances = (squares - sums ** 2 / n[..., None]) / (n[..., None] - 1)
+        total_variance = (total_squares - total ** 2 / n) / (n - 1)
+        alpha = (num_items / (num_items - 1)) * (1 - item_variances.sum(axis=-1) / total_variance)
+    return np.where(total_variance > 0, alpha, np.nan)
+
+def covariance_alpha(covariance):
+    """Alpha de Cronbach à partir de la matrice de covariance des items."""
+    num_items = len(covariance)
+    total_variance = covariance.sum()
+    if num_items < 2 or total_variance <= 0:
+        return np.nan
+    return (num_items / (num_items - 1)) * (1 - np.trace(covariance) / total_variance)
+
+def item_reliability(data):
+    """Fiabilité d'un test et de chacun de ses items, déduites de la seule matrice de covariance.
+
+    Une passe sur les lignes complètes donne la covariance des items ; l'alpha,
+    l'alpha standardisé, l'alpha si l'item est supprimé et la corrélation
+    item-total corrigée de chaque item en découlent par algèbre en O(k²).
+    Retourne (alpha, alpha standardisé, DataFrame par item), ou None si les
+    données sont insuffisantes.
+    """
+    items = data.dropna(axis=0)
+    num_items = items.shape[1]
+    if len(items) < 2 or num_items < 2:
+        return None
+    covariance = np.cov(items.to_numpy(dtype=float), rowvar=False)
+    variances = np.diag(covariance)
+    total_variance = covariance.sum()
+    alpha = covariance_alpha(covariance)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Corrélation moyenne entre items (hors diagonale) → alpha standardisé
+        correlations = covariance / np.sqrt(np.outer(variances, variances))
+        mean_correlation = (correlations.sum() - num_items) / (num_items * (num_items - 1))
+        standardized_alpha = num_items * mean_correlation / (1 + (num_items - 1) * mean_correlation)
+
+        # Sans l'item i : variance du total, somme des variances et covariance item / reste
+        item_totals = covariance.sum(axis=1)
+        rest_variance = total_variance - 2 * item_totals + variances
+        rest_covariance = item_totals - variances
+        if num_items > 2:
+            alpha_if_deleted = ((num_items - 1) / (num_items - 2)) * (
+                1 - (np.trace(covariance) - variances) / rest_variance
+            )
+        else:
+            alpha_if_deleted = np.full(num_items, np.nan)
+        item_total = rest_covariance / np.sqrt(variances * rest_variance)
+
+    statistics = pd.DataFrame({
+        "mean": items.mean(axis=0).to_numpy(),
+        "variance": variances,
+        "item_total_correlation": item_total,
+        "alpha_if_deleted": alpha_if_deleted
+    }, index=items.columns)
+    return alpha, standardized_alpha, statistics
+
+def grouped_alpha(df, group_column, tests):
+    """Alpha de Cronbach de chaque test pour chaque groupe, en une passe triée et segmentée.
+
+    `tests` associe un nom de test à ses colonnes d'items. Pour chaque test, les
+    lignes complètes sont triées par groupe une fois ; les sommes et sommes de carrés
+    des items et du score total de tous les groupes sont obtenues par np.add.reduceat.
+    Retourne (alphas, effectifs) : deux DataFrames groupes × tests.
+    """
+    codes, labels = group_codes(df[group_column])
+    alphas, sizes = {}, {}
+    for test, columns in tests.items():
+        items = df[columns].to_numpy(dtype=float)
+        keep = (codes >= 0) & np.isfinite(items).all(axis=1)
+        test_codes, items = codes[keep], items[keep]
+        order = np.argsort(test_codes, kind="stable")
+        test_codes, items = test_codes[order], items[order]
+
+        counts = np.bincount(test_codes, minlength=len(labels))
+        alpha = np.full(len(labels), np.nan)
+        present = counts > 0
+        if present.any():
+            # Centrage global : limite les erreurs d'arrondi des sommes de carrés
+            centered = items - items.mean(axis=0)
+            total = centered.sum(axis=1)
+            features = np.column_stack([centered, centered ** 2, total, total ** 2])
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+            moments = np.add.reduceat(features, starts, axis=0)
+            alpha[present] = alpha_from_moments(moments, counts[present])
+        # Variance non définie en dessous de deux élèves
+        alpha[counts < 2] = np.nan
+        alphas[test], sizes[test] = alpha, counts
+    return pd.DataFrame(alphas, index=labels), pd.DataFrame(sizes, index=labels)
+
+def _bootstrap_batch(seed, replicates, features):
+    """Alphas d'un lot de réplications bootstrap.
+
+    Les tirages avec remise sont convertis en une matrice d'effectifs (réplication ×
+    élève) ; un seul produit matriciel donne ensuite les sommes de toutes les réplications.
+    """
+    n = len(features)
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, n, size=(replicates, n))
+    indices += np.arange(replicates)[:, None] * n
+    counts = np.bincount(indices.ravel(), minlength=replicates * n).reshape(replicates, n).astype(float)
+    return alpha_from_moments(counts @ features, n)
+
+def bootstrap_alpha(data, replicates=BOOTSTRAP_REPLICATES, confidence=BOOTSTRAP_CONFIDENCE, seed=BOOTSTRAP_SEED):
+    """Intervalle de confiance bootstrap (percentiles) de l'alpha de Cronbach.
+
+    Les lignes incomplètes sont écartées comme pour l'estimation ponctuelle. Les
+    lots de réplications sont exécutés par `seeded_batches` : le résultat ne
+    dépend pas du nombre de processus.
+    Retourne (borne basse, borne haute), ou None si les données sont insuffisantes.
+    """
+    items = data.dropna(axis=0).to_numpy(dtype=float)
+    n, num_items = items.shape
+    if n < 2 or num_items < 2:
+        return None
+
+    features = alpha_features(items)
+    batch = max(1, BOOTSTRAP_BATCH_ELEMENTS // n)
+    alphas = [
+        result for _, result in seeded_batches(
+            _bootstrap_batch, features, replicates, batch, seed,
+            parallel=replicates * n >= BOOTSTRAP_PARALLEL_MIN
+        )
+    ]
+
+    alphas = np.concatenate(alphas)
+    alphas = alphas[~np.isnan(alphas)]
+    if alphas.size == 0:
+        return None
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(alphas, [tail, 100 - tail])
+    return low, high
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import scipy.stats as stats
+
+# Niveau de confiance de la bande autour des droites de régression
+TRENDLINE_CONFIDENCE = 0.95
+
+# Nombre de points de la grille sur laquelle la droite et sa bande sont tracées
+TRENDLINE_POINTS = 50
+
+# Nuages de points volumineux : rendu WebGL au-delà de SCATTER_WEBGL_MIN points, puis
+# carte de densité (comptages par case calculés côté serveur) au-delà de SCATTER_DENSITY_MIN
+SCATTER_WEBGL_MIN = 5_000
+SCATTER_DENSITY_MIN = 100_000
+DENSITY_BINS = 100
+
+def trendlines(df, x_column, y_columns):
+    """Droites des moindres carrés de chaque colonne de `y_columns` en fonction de `x_column`.
+
+    Toutes les régressions simples sont ajustées en une passe vectorisée, chacune
+    sur les lignes où x et y sont présents. Retourne un DataFrame par colonne :
+    pente, ordonnée à l'origine, R², effectif et les quantités nécessaires à la
+    bande de confiance (moyenne de x, somme des carrés des écarts de x, écart-type
+    résiduel) ainsi que l'étendue de x.
+    """
+    y_columns = list(y_columns)
+    x = df[x_column].to_numpy(dtype=float)
+    y = df[y_columns].to_numpy(dtype=float)
+    complete = np.isfinite(x)[:, None] & np.isfinite(y)
+    weights = complete.astype(float)
+
+    # Centrage de x sur sa moyenne globale : limite les erreurs d'arrondi
+    shift = np.nanmean(x) if np.isfinite(x).any() else 0.0
+    x0 = np.where(np.isfinite(x), x - shift, 0.0)
+    y0 = np.where(complete, y, 0.0)
+
+    n = weights.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = (x0 @ weights) / n
+        y_mean = y0.sum(axis=0) / n
+        sxx = ((x0 ** 2) @ weights) - n * x_mean ** 2
+        syy = (y0 ** 2).sum(axis=0) - n * y_mean ** 2
+        sxy = x0 @ y0 - n * x_mean * y_mean
+        slope = sxy / sxx
+        intercept = y_mean - slope * (x_mean + shift)
+        r2 = sxy ** 2 / (sxx * syy)
+        residual_std = np.sqrt(np.maximum(syy - slope * sxy, 0.0) / (n - 2))
+        x_min = np.nanmin(np.where(complete, x[:, None], np.nan), axis=0) if len(x) else np.full(len(y_columns), np.nan)
+        x_max = np.nanmax(np.where(complete, x[:, None], np.nan), axis=0) if len(x) else np.full(len(y_columns), np.nan)
+
+    return pd.DataFrame({
+        "slope": slope,
+        "intercept": intercept,
+        "r2": r2,
+        "n": n,
+        "x_mean": x_mean + shift,
+        "sxx": sxx,
+        "residual_std": residual_std,
+        "x_min": x_min,
+        "x_max": x_max
+    }, index=pd.Index(y_columns))
+
+def add_trendline(fig, fit, confidence=TRENDLINE_CONFIDENCE, points=TRENDLINE_POINTS):
+    """Ajoute à `fig` la droite ajustée (`fit` : une ligne de `trendlines`) et sa bande de confiance."""
+    if not (fit["n"] > 2 and np.isfinite(fit["slope"])):
+        return fig
+    grid = np.linspace(fit["x_min"], fit["x_max"], points)
+    line = fit["intercept"] + fit["slope"] * grid
+    # Intervalle de confiance de la moyenne de y pour chaque x
+    t = stats.t.ppf((1 + confidence) / 2, fit["n"] - 2)
+    margin = t * fit["residual_std"] * np.sqrt(1 / fit["n"] + (grid - fit["x_mean"]) ** 2 / fit["sxx"])
+
+    fig.add_trace(go.Scatter(
+        x=np.concatenate([grid, grid[::-1]]),
+        y=np.concatenate([line + margin, (line - margin)[::-1]]),
+        fill="toself",
+        fillcolor="rgba(239, 85, 59, 0.2)",
+        line={"width": 0},
+        hoverinfo="skip",
+        name=f"IC {confidence:.0%}",
+        showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=grid,
+        y=line,
+        mode="lines",
+        line={"color": "rgb(239, 85, 59)"},
+        name="OLS",
+        hovertemplate=(
+            f"y = {fit['slope']:.3f} x + {fit['intercept']:.3f}<br>"
+            f"R² = {fit['r2']:.3f} (n = {int(fit['n'])})<extra></extra>"
+        ),
+        showlegend=False
+    ))
+    return fig
+
+def _density_bins(values, bins):
+    """Bords et centres des cases d'un axe de la carte de densité.
+
+    Une variable ayant au plus `bins` valeurs distinctes (échelle SES, score entier)
+    reçoit une case centrée sur chaque valeur, bornée par les milieux entre valeurs
+    voisines ; sinon, `bins` cases de même largeur.
+    """
+    unique = np.unique(values)
+    if len(unique) > bins:
+        edges = np.histogram_bin_edges(values, bins=bins)
+        return edges, (edges[:-1] + edges[1:]) / 2
+    if len(unique) == 1:
+        return np.array([unique[0] - 0.5, unique[0] + 0.5]), unique
+    middles = (unique[:-1] + unique[1:]) / 2
+    edges = np.concatenate([
+        [unique[0] - (middles[0] - unique[0])],
+        middles,
+        [unique[-1] + (unique[-1] - middles[-1])]
+    ])
+    return edges, unique
+
+def density_figure(df, x, y, title=None, labels=None, bins=DENSITY_BINS):
+    """Carte de densité des couples (x, y) : le volume transmis dépend de la grille, pas des effectifs.
+
+    Les comptages sont calculés avec np.histogram2d sur les cases de `_density_bins`.
+    """
+    labels = labels or {}
+    values = df[[x, y]].to_numpy(dtype=float)
+    values = values[np.isfinite(values).all(axis=1)]
+    x_edges, x_centers = _density_bins(values[:, 0], bins)
+    y_edges, y_centers = _density_bins(values[:, 1], bins)
+    counts, _, _ = np.histogram2d(values[:, 0], values[:, 1], bins=[x_edges, y_edges])
+
+    fig = go.Figure(go.Heatmap(
+        x=x_centers,
+        y=y_centers,
+        # Cases vides transparentes
+        z=np.where(counts.T > 0, counts.T, np.nan),
+        colorscale="Viridis",
+        colorbar={"title": "Élèves"},
+        hovertemplate="x = %{x:.2f}<br>y = %{y:.2f}<br>%{z:.0f} élèves<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get(x, x),
+        yaxis_title=labels.get(y, y)
+    )
+    return fig
+
+def scatter_with_trendline(df, x, y, fit, **kwargs):
+    """Nuage de points complété par une droite des moindres carrés précalculée.
+
+    Le rendu s'adapte au nombre de points : SVG, puis WebGL, puis carte de densité.
+    """
+    points = int(df[[x, y]].notna().all(axis=1).sum())
+    if points > SCATTER_DENSITY_MIN:
+        fig = density_figure(df, x, y, title=kwargs.get("title"), labels=kwargs.get("labels"))
+    elif points > SCATTER_WEBGL_MIN:
+        fig = px.scatter(df, x=x, y=y, render_mode="webgl", **kwargs)
+    else:
+        fig = px.scatter(df, x=x, y=y, **kwargs)
+    return add_trendline(fig, fit)
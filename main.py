@@ -1,21 +1,29 @@
 import streamlit as st
 import pandas as pd
+import time
 from pathlib import Path
 
+from chargement import dataset_attrs, load_columns, submit_dataset, submit_sources
+
 # Import des analyses (tous les fichiers dans le même dossier)
-from analyse1 import show_statistics
-from analyse2 import show_zero_scores
-from analyse3 import show_school_comparison
-from analyse4 import show_language_effect
-from analyse5 import show_correlation
-from analyse6 import show_cronbach
-from analyse7 import show_performance_school
-from analyse8 import show_contextual_factors
-from analyse9 import show_classroom_practices
-from analyse10 import show_gender_effect
-from analyse11 import show_ses_home_support
-from analyse12 import show_international_comparison
-from analyse13 import show_language_comparison
+from analyse1 import show_statistics, required_columns as analyse1_columns
+from analyse2 import show_zero_scores, required_columns as analyse2_columns
+from analyse3 import show_school_comparison, required_columns as analyse3_columns
+from analyse4 import show_language_effect, required_columns as analyse4_columns
+from analyse5 import show_correlation, required_columns as analyse5_columns
+from analyse6 import show_cronbach, required_columns as analyse6_columns
+from analyse7 import show_performance_school, required_columns as analyse7_columns
+from analyse8 import show_contextual_factors, required_columns as analyse8_columns
+from analyse9 import show_classroom_practices, required_columns as analyse9_columns
+from analyse10 import show_gender_effect, required_columns as analyse10_columns
+from analyse11 import show_ses_home_support, required_columns as analyse11_columns
+from analyse12 import show_international_comparison, required_columns as analyse12_columns
+from analyse13 import show_language_comparison, required_columns as analyse13_columns
+
+# Copy-on-Write : les analyses ajoutent leurs colonnes dérivées sans dupliquer
+# le jeu de données (comportement par défaut à partir de pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # Configuration de la page
 st.set_page_config(
@@ -24,38 +32,71 @@ st.set_page_config(
     layout="wide"
 )
 
-# Dictionnaire des analyses disponibles
+# Dictionnaire des analyses disponibles : fonction d'affichage et colonnes nécessaires
 ANALYSES = {
-    "📊 1. Statistiques Descriptives": show_statistics,
-    "⚠️ 2. Scores Zéro": show_zero_scores,
-    "🏫 3. Comparaison entre Écoles": show_school_comparison,
-    "🗣 4. Effet de la Langue": show_language_effect,
-    "📉 5. Corrélations": show_correlation,
-    "📈 6. Fiabilité des Tests (Cronbach)": show_cronbach,
-    "🏫 7. Performance par École": show_performance_school,
-    "🏡 8. Facteurs Contextuels": show_contextual_factors,
-    "👩‍🏫 9. Pratiques en Classe": show_classroom_practices,
-    "🚻 10. Effet du Genre": show_gender_effect,
-    "💰 11. Impact du SES & Soutien": show_ses_home_support,
-    "🌍 12. Comparaison Internationale": show_international_comparison,
-    "🇳🇱🇬🇧 13. Anglophones vs Néerlandophones": show_language_comparison,
+    "📊 1. Statistiques Descriptives": (show_statistics, analyse1_columns),
+    "⚠️ 2. Scores Zéro": (show_zero_scores, analyse2_columns),
+    "🏫 3. Comparaison entre Écoles": (show_school_comparison, analyse3_columns),
+    "🗣 4. Effet de la Langue": (show_language_effect, analyse4_columns),
+    "📉 5. Corrélations": (show_correlation, analyse5_columns),
+    "📈 6. Fiabilité des Tests (Cronbach)": (show_cronbach, analyse6_columns),
+    "🏫 7. Performance par École": (show_performance_school, analyse7_columns),
+    "🏡 8. Facteurs Contextuels": (show_contextual_factors, analyse8_columns),
+    "👩‍🏫 9. Pratiques en Classe": (show_classroom_practices, analyse9_columns),
+    "🚻 10. Effet du Genre": (show_gender_effect, analyse10_columns),
+    "💰 11. Impact du SES & Soutien": (show_ses_home_support, analyse11_columns),
+    "🌍 12. Comparaison Internationale": (show_international_comparison, analyse12_columns),
+    "🇳🇱🇬🇧 13. Anglophones vs Néerlandophones": (show_language_comparison, analyse13_columns),
 }
 
+# Intervalle de rafraîchissement pendant l'ingestion en arrière-plan (secondes)
+INGEST_POLL_SECONDS = 0.5
+
 def load_data():
-    """Charge les données depuis le fichier Excel."""
+    """Lance l'ingestion du fichier importé (Excel, CSV, Parquet ou Feather) et retourne son suivi."""
     try:
         # Chargement du fichier de données
-        uploaded_file = st.file_uploader(
-            "Choisissez votre fichier Excel",
-            type=["xlsx", "xls"],
-            help="Sélectionnez le fichier contenant les données EGRA/EGMA"
+        uploaded_files = st.file_uploader(
+            "Choisissez vos fichiers de données",
+            type=["xlsx", "xls", "csv", "parquet", "feather", "arrow"],
+            accept_multiple_files=True,
+            help="Sélectionnez le fichier contenant les données EGRA/EGMA, ou un fichier par district à fusionner"
+        )
+        all_sheets = st.checkbox(
+            "Fusionner toutes les feuilles des classeurs",
+            help="Une feuille par école : les feuilles sont lues en parallèle puis fusionnées avec une colonne « source »"
         )
         
-        if uploaded_file is not None:
-            df = pd.read_excel(uploaded_file, sheet_name="Sheet1")
-            return df
+        if uploaded_files:
+            # Le contenu est haché : le classeur n'est parsé qu'une fois, sur un thread de travail
+            if len(uploaded_files) == 1 and not all_sheets:
+                job = submit_dataset(uploaded_files[0].getvalue(), filename=uploaded_files[0].name)
+            else:
+                job = submit_sources(
+                    [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files],
+                    all_sheets=all_sheets
+                )
+            
+            if not job.done:
+                fraction = min(job.rows_read / job.total_rows, 1.0) if job.total_rows else 0.0
+                st.progress(
+                    fraction,
+                    text=f"Lecture du fichier : {job.rows_read:,} lignes ({job.elapsed:.0f} s)"
+                )
+                return job
+            if job.error is not None:
+                raise job.error
+            
+            # Empreinte mémoire avant/après compaction des types
+            memory_usage = dataset_attrs(job.key).get("memory_usage")
+            if memory_usage:
+                st.sidebar.caption(
+                    f"💾 Mémoire des données : {memory_usage['before'] / 1024 ** 2:.1f} Mo "
+                    f"→ {memory_usage['after'] / 1024 ** 2:.1f} Mo"
+                )
+            return job
         else:
-            st.warning("Veuillez uploader un fichier Excel pour commencer l'analyse.")
+            st.warning("Veuillez uploader un fichier de données (Excel, CSV, Parquet ou Feather) pour commencer l'analyse.")
             return None
             
     except Exception as e:
@@ -69,8 +110,8 @@ def main():
     st.sidebar.title("Tableau de Bord")
     st.sidebar.divider()
     
-    # Chargement des données
-    df = load_data()
+    # Chargement des données (en arrière-plan)
+    job = load_data()
     
     # Sélection de l'analyse
     analysis = st.sidebar.radio(
@@ -79,14 +120,21 @@ def main():
         key="analysis_selector"
     )
     
-    if df is not None:
+    if job is not None and not job.done:
+        # L'analyse reste sélectionnable ; elle s'exécutera dès que les données seront prêtes
+        st.title(analysis)
+        st.info("⏳ Chargement des données en cours : l'analyse s'affichera dès qu'elles seront prêtes.")
+        time.sleep(INGEST_POLL_SECONDS)
+        st.rerun()
+    
+    if job is not None and job.done:
         # Affichage du contenu principal
         st.title(analysis)
         st.divider()
         
-        # Appel de la fonction d'analyse correspondante
-        selected_analysis = ANALYSES[analysis]
-        selected_analysis(df)
+        # Appel de la fonction d'analyse avec ses seules colonnes
+        selected_analysis, columns = ANALYSES[analysis]
+        selected_analysis(load_columns(job.key, columns))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
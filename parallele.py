@@ -0,0 +1,50 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+# Données partagées par les processus du pool (voir _init_worker)
+_shared = None
+
+def _init_worker(shared):
+    """Transmet une seule fois les données partagées à chaque processus."""
+    global _shared
+    _shared = shared
+
+def _run_batch(function, seed, size):
+    """Exécute un lot dans un processus de travail, sur les données partagées."""
+    return function(seed, size, _shared)
+
+def seeded_batches(function, shared, total, batch, seed, parallel=True):
+    """Exécute `total` tirages par lots de `batch` et génère (taille, résultat) dans l'ordre des lots.
+
+    `function(graine, taille, shared)` traite un lot ; chaque lot reçoit une graine
+    dérivée de `seed` (SeedSequence.spawn), si bien que les résultats ne dépendent
+    pas du nombre de processus. Si `parallel` est vrai et que plusieurs processeurs
+    sont disponibles, les lots sont répartis par vagues sur un pool de processus ;
+    l'appelant peut interrompre l'itération (arrêt anticipé) entre deux lots.
+    """
+    sizes = [batch] * (total // batch) + ([total % batch] if total % batch else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = min(len(sizes), os.cpu_count() or 1)
+    if not parallel or workers < 2:
+        for s, size in zip(seeds, sizes):
+            yield size, function(s, size, shared)
+        return
+
+    # « spawn » : le processus Streamlit est multi-thread, fork n'y est pas sûr
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(shared,)
+    ) as pool:
+        # Vagues de `workers` lots : une interruption n'attend que la vague en cours
+        for start in range(0, len(sizes), workers):
+            wave_sizes = sizes[start:start + workers]
+            results = pool.map(_run_batch, repeat(function), seeds[start:start + workers], wave_sizes)
+            yield from zip(wave_sizes, results)
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from parallele import seeded_batches
+from statistiques import rank_columns
+
+# Paramètres des tests par permutation
+PERMUTATION_MAX = 10_000
+PERMUTATION_ALPHA = 0.05
+PERMUTATION_SEED = 20240902  # graine fixe : p-values reproductibles d'une exécution à l'autre
+
+# Arrêt anticipé : une colonne est tranchée dès que l'intervalle de confiance de sa
+# p-value (Clopper-Pearson, 99 %) est entièrement au-dessus ou au-dessous du seuil
+PERMUTATION_DECISION_LEVEL = 0.99
+
+# Taille d'un lot (permutations × élèves), qui borne la mémoire des étiquettes permutées,
+# et nombre maximal de permutations par lot (granularité de l'arrêt anticipé) ;
+# en dessous de PERMUTATION_PARALLEL_MIN valeurs traitées au total, pas de pool
+PERMUTATION_BATCH_ELEMENTS = 2_000_000
+PERMUTATION_BATCH_MAX = 1000
+PERMUTATION_PARALLEL_MIN = 50_000_000
+
+def _group_statistic(codes, ranks, valid, num_groups):
+    """Σ R_g² / n_g de chaque colonne, pour chaque vecteur d'étiquettes (une ligne de `codes`).
+
+    Les rangs étant fixes d'une permutation à l'autre, cette somme varie comme le H de
+    Kruskal-Wallis (et, pour deux groupes, comme l'écart |U − n1·n2/2| de Mann-Whitney).
+    """
+    statistic = np.zeros((len(codes), ranks.shape[1]))
+    for group in range(num_groups):
+        members = (codes == group).astype(float)
+        rank_sums = members @ ranks
+        sizes = members @ valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            statistic += np.where(sizes > 0, rank_sums ** 2 / sizes, 0.0)
+    return statistic
+
+def _permutation_batch(seed, permutations, ranked):
+    """Nombre de permutations d'un lot dont la statistique atteint l'observée, par colonne."""
+    codes, ranks, valid, num_groups, observed = ranked
+    rng = np.random.default_rng(seed)
+    permuted = rng.permuted(np.broadcast_to(codes, (permutations, len(codes))), axis=1)
+    statistic = _group_statistic(permuted, ranks, valid, num_groups)
+    # Tolérance relative : égalités exactes perturbées par les arrondis flottants
+    return np.sum(statistic >= observed * (1 - 1e-12), axis=0)
+
+def permutation_test(values, codes, max_permutations=PERMUTATION_MAX, alpha=PERMUTATION_ALPHA, seed=PERMUTATION_SEED):
+    """Test par permutation des différences entre groupes, pour toutes les colonnes de `values`.
+
+    `codes` donne le groupe de chaque ligne (-1 : ligne exclue). La statistique est le
+    H de Kruskal-Wallis calculé sur les rangs (équivalent à Mann-Whitney bilatéral pour
+    deux groupes). Les étiquettes sont permutées par lots ; chaque lot évalue toutes
+    les colonnes par produits matriciels. Les lots sont exécutés par
+    `seeded_batches`, éventuellement en parallèle ; le calcul s'arrête dès que chaque
+    colonne est tranchée par rapport à `alpha`. Retourne un DataFrame par colonne :
+    H observé, p-value par permutation et nombre de permutations utilisées.
+    """
+    columns = list(values.columns)
+    codes = np.asarray(codes)
+    keep = codes >= 0
+    codes = codes[keep]
+    ranks, ties = rank_columns(values[columns].to_numpy(dtype=float)[keep])
+    valid = ~np.isnan(ranks)
+    ranks = np.where(valid, ranks, 0.0)
+    valid = valid.astype(float)
+    num_groups = int(codes.max()) + 1 if codes.size else 0
+
+    observed = _group_statistic(codes[None, :], ranks, valid, num_groups)[0]
+    n = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        h = (12 / (n * (n + 1)) * observed - 3 * (n + 1)) / (1 - ties / (n ** 3 - n))
+
+    ranked = (codes, ranks, valid, num_groups, observed)
+    batch = max(1, min(PERMUTATION_BATCH_MAX, PERMUTATION_BATCH_ELEMENTS // max(len(codes), 1)))
+
+    exceed = np.zeros(len(columns))
+    used = np.zeros(len(columns))
+    decided = np.zeros(len(columns), dtype=bool)
+    tail = (1 - PERMUTATION_DECISION_LEVEL) / 2
+
+    # Lots cumulés dans l'ordre ; une colonne tranchée n'est plus mise à jour
+    for size, counts in seeded_batches(
+        _permutation_batch, ranked, max_permutations, batch, seed,
+        parallel=max_permutations * len(codes) * len(columns) >= PERMUTATION_PARALLEL_MIN
+    ):
+        open_columns = ~decided
+        exceed[open_columns] += counts[open_columns]
+        used[open_columns] += size
+        low = stats.beta.ppf(tail, exceed, used - exceed + 1)
+        high = stats.beta.ppf(1 - tail, exceed + 1, used - exceed)
+        low, high = np.nan_to_num(low, nan=0.0), np.nan_to_num(high, nan=1.0)
+        decided[open_columns & ((high < alpha) | (low > alpha))] = True
+        if decided.all():
+            break
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = (exceed + 1) / (used + 1)
+    untestable = (n < 2) | np.isnan(h)
+    return pd.DataFrame({
+        "H": np.where(untestable, np.nan, h),
+        "p": np.where(untestable, np.nan, p),
+        "permutations": used.astype(int)
+    }, index=pd.Index(columns))
@@ -0,0 +1,502 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+# Statistiques produites par describe(), dans le même ordre
+DESCRIBE_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+# Nombre maximal de valeurs classées ensemble lorsque chaque couple de variables
+# a ses propres lignes complètes (borne la mémoire des matrices masquées)
+RANK_BATCH_ELEMENTS = 4_000_000
+
+def group_codes(groups):
+    """Codes entiers (-1 pour NaN) et libellés triés des groupes observés d'une variable."""
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        codes = groups.cat.codes.to_numpy().astype(np.int64)
+        labels = groups.cat.categories
+    else:
+        codes, labels = pd.factorize(groups, sort=True)
+        codes = codes.astype(np.int64)
+    # Seuls les groupes présents dans les données sont conservés
+    sizes = np.bincount(codes[codes >= 0], minlength=len(labels))
+    observed = sizes > 0
+    remap = np.where(observed, np.cumsum(observed) - 1, -1)
+    present = codes >= 0
+    codes[present] = remap[codes[present]]
+    return codes, pd.Index(labels[observed], name=groups.name)
+
+def sort_by_group(codes, values):
+    """Trie les lignes par code de groupe ; retourne codes, valeurs et début de chaque segment."""
+    keep = codes >= 0
+    codes, values = codes[keep], values[keep]
+    order = np.argsort(codes, kind="stable")
+    codes, values = codes[order], values[order]
+    n_groups = codes.max() + 1 if codes.size else 0
+    starts = np.searchsorted(codes, np.arange(n_groups))
+    return codes, values, starts
+
+def grouped_describe(df, group_column, columns):
+    """Équivalent vectorisé de df.groupby(group_column)[columns].describe().
+
+    Les lignes sont triées une fois par groupe, puis chaque colonne est triée dans
+    son groupe par deux tris stables sur le tableau 2D entier. Retourne un DataFrame
+    indexé par groupe avec les colonnes aplaties « <colonne>_<statistique> ».
+    """
+    codes, labels = group_codes(df[group_column])
+    values = df[columns].to_numpy(dtype=float)
+    codes, values, starts = sort_by_group(codes, values)
+    n_groups, n_columns = len(labels), len(columns)
+    if n_groups == 0:
+        # Aucune valeur de groupe renseignée : tableau vide, comme groupby().describe()
+        return pd.DataFrame(
+            columns=[f"{col}_{stat}" for col in columns for stat in DESCRIBE_STATS],
+            index=labels,
+            dtype=float
+        )
+
+    # Tri des valeurs dans chaque groupe : par valeur (NaN en dernier), puis par groupe
+    by_value = np.argsort(values, axis=0, kind="stable")
+    by_group = np.argsort(codes[by_value], axis=0, kind="stable")
+    sorted_values = np.take_along_axis(values, np.take_along_axis(by_value, by_group, axis=0), axis=0)
+
+    missing = np.isnan(values)
+    counts = np.add.reduceat(~missing, starts, axis=0).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.add.reduceat(np.where(missing, 0.0, values), starts, axis=0) / counts
+        deviations = np.where(missing, 0.0, values - means[codes]) ** 2
+        stds = np.sqrt(np.add.reduceat(deviations, starts, axis=0) / (counts - 1))
+    stds[counts < 2] = np.nan
+
+    # Quantiles par interpolation linéaire entre les rangs encadrants (méthode de pandas)
+    present = counts > 0
+    last = np.maximum(counts - 1, 0)
+    column_index = np.arange(n_columns)
+
+    def order_statistic(position):
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        low_values = sorted_values[starts[:, None] + low, column_index]
+        high_values = sorted_values[starts[:, None] + high, column_index]
+        result = low_values + (position - low) * (high_values - low_values)
+        return np.where(present, result, np.nan)
+
+    stats = {
+        "count": counts,
+        "mean": means,
+        "std": stds,
+        "min": order_statistic(np.zeros_like(last)),
+        "25%": order_statistic(last * 0.25),
+        "50%": order_statistic(last * 0.50),
+        "75%": order_statistic(last * 0.75),
+        "max": order_statistic(last)
+    }
+
+    result = {
+        f"{col}_{stat}": stats[stat][:, j]
+        for j, col in enumerate(columns)
+        for stat in DESCRIBE_STATS
+    }
+    return pd.DataFrame(result, index=labels[:n_groups])
+
+def rank_columns(values):
+    """Rangs moyens de chaque colonne d'une matrice 2D, en une seule opération.
+
+    Les valeurs manquantes ou infinies restent NaN et ne sont pas classées. Retourne les rangs et, pour chaque
+    colonne, le terme de correction des ex-aequo Σ(t³ − t).
+    """
+    # Travail sur la transposée contiguë : chaque variable est une ligne en mémoire
+    values = np.ascontiguousarray(np.asarray(values, dtype=float).T)
+    n_columns, n_rows = values.shape
+    if n_rows == 0:
+        return np.full((0, n_columns), np.nan), np.zeros(n_columns)
+    finite = np.isfinite(values)
+    # Les valeurs non classées sont triées en fin de colonne sous forme de +inf
+    # (le tri de numpy est bien plus lent en présence de NaN)
+    order = np.argsort(np.where(finite, values, np.inf), axis=1)
+    offsets = (np.arange(n_columns) * n_rows)[:, None]
+    flat_order = (order + offsets).ravel()
+    sorted_values = values.ravel()[flat_order]
+    valid = finite.ravel()[flat_order]
+
+    # Séries d'ex-aequo sur toute la matrice ; chaque colonne et chaque valeur non
+    # classée en ouvrent une nouvelle
+    new_run = np.empty(sorted_values.shape, dtype=bool)
+    new_run[1:] = sorted_values[1:] != sorted_values[:-1]
+    new_run[::n_rows] = True
+    new_run |= ~valid
+    starts = np.flatnonzero(new_run)
+    lengths = np.diff(starts, append=sorted_values.size)
+    mean_ranks = starts % n_rows + (lengths + 1) / 2
+
+    ranks = np.empty(n_columns * n_rows)
+    ranks[flat_order] = np.where(valid, np.repeat(mean_ranks, lengths), np.nan)
+    ties = np.bincount(starts // n_rows, weights=lengths ** 3.0 - lengths, minlength=n_columns)
+    return ranks.reshape(n_columns, n_rows).T, ties
+
+def mann_whitney_batch(first, second):
+    """Test de Mann-Whitney bilatéral sur toutes les colonnes communes de deux DataFrames.
+
+    Les deux échantillons sont empilés et classés en une passe ; U est celui du
+    premier échantillon (comme scipy), la p-value suit l'approximation normale avec
+    correction des ex-aequo et de continuité. L'effet est la corrélation bisériale
+    de rang r = 2U / (n1·n2) − 1. Les colonnes sans observation dans un des deux
+    groupes donnent des NaN.
+    """
+    columns = list(first.columns)
+    x = first[columns].to_numpy(dtype=float)
+    y = second[columns].to_numpy(dtype=float)
+    ranks, ties = rank_columns(np.vstack([x, y]))
+
+    n1 = np.sum(np.isfinite(x), axis=0).astype(float)
+    n2 = np.sum(np.isfinite(y), axis=0).astype(float)
+    n = n1 + n2
+    u1 = np.nansum(ranks[:len(x)], axis=0) - n1 * (n1 + 1) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = n1 * n2 / 2
+        sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+        distance = np.maximum(np.abs(u1 - mu) - 0.5, 0)
+        z = np.sign(u1 - mu) * distance / sigma
+        p = np.minimum(2 * stats.norm.sf(distance / sigma), 1.0)
+        effect = 2 * u1 / (n1 * n2) - 1
+
+    empty = (n1 == 0) | (n2 == 0)
+    result = pd.DataFrame(
+        {"n1": n1, "n2": n2, "U": u1, "z": z, "p": p, "effect_size": effect},
+        index=pd.Index(columns)
+    )
+    result.loc[empty, ["U", "z", "p", "effect_size"]] = np.nan
+    return result
+
+def kruskal_batch(values, codes, labels):
+    """Test de Kruskal-Wallis de chaque colonne de `values` selon les groupes `codes`.
+
+    `codes` et `labels` viennent d'un index de groupes (code -1 : ligne sans groupe).
+    Toutes les colonnes sont classées en une passe ; les mêmes rangs servent aux
+    comparaisons post-hoc de Dunn (correction de Bonferroni par variable). Dans
+    chaque colonne, seuls les groupes ayant au moins une observation sont comparés.
+    Retourne (tests, dunn) : H, degrés de liberté et p-value par colonne, puis une
+    ligne par paire de groupes et par colonne.
+    """
+    columns = list(values.columns)
+    codes, matrix, starts = sort_by_group(np.asarray(codes), values[columns].to_numpy(dtype=float))
+    ranks, ties = rank_columns(matrix)
+    valid = ~np.isnan(ranks)
+
+    # Effectifs et sommes de rangs par groupe (lignes) et par colonne
+    sizes = np.add.reduceat(valid, starts, axis=0).astype(float)
+    rank_sums = np.add.reduceat(np.where(valid, ranks, 0.0), starts, axis=0)
+    n = sizes.sum(axis=0)
+    present = sizes > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_ranks = rank_sums / sizes
+        tie_factor = 1 - ties / (n ** 3 - n)
+        h = (12 / (n * (n + 1)) * np.sum(np.where(present, rank_sums ** 2 / sizes, 0.0), axis=0)
+             - 3 * (n + 1)) / tie_factor
+    dof = present.sum(axis=0) - 1
+    p = np.where(dof > 0, stats.chi2.sf(h, np.maximum(dof, 1)), np.nan)
+    tests = pd.DataFrame(
+        {"n": n, "H": np.where(dof > 0, h, np.nan), "dof": dof, "p": p},
+        index=pd.Index(columns)
+    )
+
+    # Dunn : différences de rangs moyens de toutes les paires, toutes colonnes à la fois
+    first, second = np.triu_indices(len(starts), k=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = n * (n + 1) / 12 - ties / (12 * (n - 1))
+        se = np.sqrt(variance * (1 / sizes[first] + 1 / sizes[second]))
+        z = (mean_ranks[first] - mean_ranks[second]) / se
+    compared = present[first] & present[second]
+    p_pairs = np.where(compared, 2 * stats.norm.sf(np.abs(z)), np.nan)
+    p_adjusted = np.minimum(p_pairs * compared.sum(axis=0), 1.0)
+
+    group_labels = np.asarray(labels[:len(starts)], dtype=object)
+    dunn = pd.DataFrame({
+        "variable": np.repeat(np.asarray(columns, dtype=object)[None, :], len(first), axis=0).ravel(),
+        "group_1": np.repeat(group_labels[first], len(columns)),
+        "group_2": np.repeat(group_labels[second], len(columns)),
+        "z": z.ravel(),
+        "p": p_pairs.ravel(),
+        "p_bonferroni": p_adjusted.ravel()
+    })
+    dunn = dunn[compared.ravel()].sort_values("variable", kind="stable", key=lambda s: s.map(columns.index))
+    return tests, dunn.reset_index(drop=True)
+
+def masked_ranks(values, sources, masks):
+    """Rangs de chaque colonne `values[:, sources[j]]` restreinte aux lignes `masks[:, j]`.
+
+    Chaque combinaison distincte (colonne, masque) n'est classée qu'une fois, et
+    toutes en une seule passe : sans données manquantes propres à un couple,
+    chaque variable n'est classée qu'une seule fois.
+    """
+    slots = {}
+    columns = np.empty(len(sources), dtype=np.int64)
+    for j, source in enumerate(sources):
+        key = (source, np.packbits(masks[:, j]).tobytes())
+        columns[j] = slots.setdefault(key, len(slots))
+    first = np.unique(columns, return_index=True)[1]
+    sources = np.asarray(sources)[first]
+    ranks, _ = rank_columns(np.where(masks[:, first], values[:, sources], np.nan))
+    return ranks[:, columns]
+
+def _correlation_p_values(r, n):
+    """p-values bilatérales d'une corrélation (loi de Student à n − 2 degrés de liberté)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = r * np.sqrt((n - 2) / ((1 - r) * (1 + r)))
+        return np.where(n > 2, 2 * stats.t.sf(np.abs(t), np.maximum(n - 2, 1)), np.nan)
+
+def _spearman_columns(values, x_sources, y_sources):
+    """Effectifs et rho de Spearman des couples de colonnes (x_sources[j], y_sources[j]).
+
+    Les couples sont traités par lots pour borner la mémoire des matrices masquées.
+    """
+    batch = max(1, RANK_BATCH_ELEMENTS // max(len(values), 1))
+    if len(x_sources) > batch:
+        results = [
+            _spearman_columns(values, x_sources[start:start + batch], y_sources[start:start + batch])
+            for start in range(0, len(x_sources), batch)
+        ]
+        return np.concatenate([n for n, _ in results]), np.concatenate([rho for _, rho in results])
+    finite = np.isfinite(values)
+    complete = finite[:, x_sources] & finite[:, y_sources]
+    ranks = masked_ranks(
+        values,
+        np.concatenate([x_sources, y_sources]),
+        np.hstack([complete, complete])
+    )
+    n_pairs = len(x_sources)
+    x_ranks, y_ranks = ranks[:, :n_pairs], ranks[:, n_pairs:]
+
+    n = complete.sum(axis=0).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Rang moyen (n + 1) / 2 dans chaque colonne masquée
+        x_centered = np.where(complete, x_ranks - (n + 1) / 2, 0.0)
+        y_centered = np.where(complete, y_ranks - (n + 1) / 2, 0.0)
+        rho = np.sum(x_centered * y_centered, axis=0) / np.sqrt(
+            np.sum(x_centered ** 2, axis=0) * np.sum(y_centered ** 2, axis=0)
+        )
+    return n, np.clip(rho, -1.0, 1.0)
+
+def spearman_pairs(df, x_columns, y_columns):
+    """Corrélations de Spearman de chaque couple (x, y), sur les lignes complètes du couple.
+
+    Les deux colonnes de chaque couple sont classées sur les seules lignes où
+    aucune des deux ne manque ; tous les classements sont faits en une passe puis
+    corrélés colonne à colonne. La p-value suit la loi de Student à n − 2 degrés
+    de liberté (comme scipy.stats.spearmanr). Retourne un DataFrame indexé par
+    (x, y) avec n, rho et p.
+    """
+    x_columns, y_columns = list(x_columns), list(y_columns)
+    values = df[x_columns + y_columns].to_numpy(dtype=float)
+    n_x, n_y = len(x_columns), len(y_columns)
+    # Couples (x, y) dans l'ordre x puis y, une colonne de matrice par couple
+    n, rho = _spearman_columns(
+        values,
+        np.repeat(np.arange(n_x), n_y),
+        np.tile(np.arange(n_x, n_x + n_y), n_x)
+    )
+    p = _correlation_p_values(rho, n)
+
+    index = pd.MultiIndex.from_product([x_columns, y_columns], names=["x", "y"])
+    return pd.DataFrame({"n": n, "rho": rho, "p": p}, index=index)
+
+def _standardize(values, finite):
+    """Centre et réduit chaque colonne sur ses valeurs présentes (0 aux valeurs manquantes).
+
+    Le coefficient de Pearson est invariant par centrage-réduction ; celle-ci limite
+    les erreurs d'arrondi des produits matriciels.
+    """
+    counts = finite.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(finite, values, 0.0).sum(axis=0) / counts
+        centered = np.where(finite, values - means, 0.0)
+        scales = np.sqrt((centered ** 2).sum(axis=0) / counts)
+    return centered / np.where(scales > 0, scales, 1.0)
+
+def _pearson_block(standardized, squares, weights, first, second):
+    """Effectifs et coefficients de Pearson entre deux blocs de colonnes, lignes complètes par paire.
+
+    Chaque somme restreinte aux lignes complètes d'une paire est un produit matriciel
+    avec l'indicatrice des valeurs présentes. Sans aucune valeur manquante
+    (`weights` à None), un seul produit des colonnes centrées-réduites suffit.
+    """
+    if weights is None:
+        products = standardized[:, first].T @ standardized[:, second]
+        n = np.full(products.shape, float(len(standardized)))
+        return n, np.clip(products / n, -1.0, 1.0)
+    n = weights[:, first].T @ weights[:, second]
+    # sums[i, j] : somme de la colonne i (bloc 1) sur les lignes où i et j sont présentes
+    sums = standardized[:, first].T @ weights[:, second]
+    squares_first = squares[:, first].T @ weights[:, second]
+    if first == second:
+        # Bloc diagonal : les sommes du second bloc sont les transposées du premier
+        sums_second, squares_second = sums.T, squares_first.T
+    else:
+        sums_second = weights[:, first].T @ standardized[:, second]
+        squares_second = weights[:, first].T @ squares[:, second]
+    products = standardized[:, first].T @ standardized[:, second]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (n * products - sums * sums_second) / np.sqrt(
+            (n * squares_first - sums ** 2) * (n * squares_second - sums_second ** 2)
+        )
+    return n, np.clip(r, -1.0, 1.0)
+
+def _pearson_matrix(values, finite):
+    """Effectifs et coefficients de Pearson de toutes les paires, lignes complètes par paire."""
+    standardized = _standardize(values, finite)
+    every = slice(None)
+    if finite.all():
+        return _pearson_block(standardized, None, None, every, every)
+    return _pearson_block(standardized, standardized ** 2, finite.astype(float), every, every)
+
+def correlation_matrix(df, columns, method="pearson"):
+    """Matrices de corrélation, d'effectifs et de p-values sur les lignes complètes de chaque paire.
+
+    `method` vaut "pearson", "spearman" ou "kendall". Pearson et Spearman sont
+    calculés pour toutes les paires par produits matriciels ; pour Spearman, chaque
+    colonne est classée une seule fois et seules les paires dont les données
+    manquantes diffèrent sont reclassées (en une passe). Kendall est calculé paire
+    par paire (tau-b de scipy). Retourne (coefficients, effectifs, p-values).
+    """
+    columns = list(columns)
+    values = df[columns].to_numpy(dtype=float)
+    finite = np.isfinite(values)
+
+    if method == "pearson":
+        n, r = _pearson_matrix(values, finite)
+        p = _correlation_p_values(r, n)
+    elif method == "spearman":
+        ranks, _ = rank_columns(values)
+        n, r = _pearson_matrix(ranks, finite)
+        # Les rangs d'une colonne entière ne valent que si la paire n'a perdu aucune ligne
+        own = np.diag(n)
+        first, second = np.triu_indices(len(columns), k=1)
+        reranked = (n[first, second] != own[first]) | (n[first, second] != own[second])
+        if reranked.any():
+            first, second = first[reranked], second[reranked]
+            _, rho = _spearman_columns(values, first, second)
+            r[first, second] = r[second, first] = rho
+        p = _correlation_p_values(r, n)
+    elif method == "kendall":
+        n = finite.T.astype(float) @ finite.astype(float)
+        r = np.full(n.shape, np.nan)
+        p = np.full(n.shape, np.nan)
+        for i, j in zip(*np.triu_indices(len(columns), k=1)):
+            complete = finite[:, i] & finite[:, j]
+            if complete.sum() > 1:
+                r[i, j], p[i, j] = stats.kendalltau(values[complete, i], values[complete, j])
+                r[j, i], p[j, i] = r[i, j], p[i, j]
+        np.fill_diagonal(r, 1.0)
+    else:
+        raise ValueError(f"Méthode de corrélation inconnue : {method}")
+
+    # Diagonale : 1 pour toute colonne non constante, p-value non définie
+    diagonal = np.arange(len(columns))
+    r[diagonal, diagonal] = np.where(np.isnan(r[diagonal, diagonal]), np.nan, 1.0)
+    p[diagonal, diagonal] = np.nan
+    return (
+        pd.DataFrame(r, index=columns, columns=columns),
+        pd.DataFrame(n, index=columns, columns=columns),
+        pd.DataFrame(p, index=columns, columns=columns)
+    )
+
+def strong_pairs(coefficients, counts, p_values, threshold=0.5):
+    """Paires de variables dont |r| dépasse le seuil, extraites du triangle supérieur.
+
+    Retourne un DataFrame (variable_1, variable_2, r, n, p) trié par |r| décroissant.
+    """
+    first, second = np.triu_indices(len(coefficients), k=1)
+    r = coefficients.to_numpy()[first, second]
+    keep = np.abs(r) > threshold
+    first, second = first[keep], second[keep]
+    labels = np.asarray(coefficients.columns, dtype=object)
+    pairs = pd.DataFrame({
+        "variable_1": labels[first],
+        "variable_2": labels[second],
+        "r": r[keep],
+        "n": counts.to_numpy()[first, second],
+        "p": p_values.to_numpy()[first, second]
+    })
+    order = np.argsort(-np.abs(pairs["r"].to_numpy()), kind="stable")
+    return pairs.iloc[order].reset_index(drop=True)
+
+def top_correlations(df, columns, top_k=50, threshold=None, method="pearson", block_size=512):
+    """Paires de variables les plus corrélées, sans construire la matrice p × p complète.
+
+    Les colonnes sont centrées-réduites une fois, puis les corrélations (lignes
+    complètes par paire) sont calculées par blocs de `block_size` colonnes. Seules
+    les paires retenues sont conservées : les `top_k` plus fortes en |r| (tas borné)
+    et/ou toutes celles au-delà de `threshold`. Pour "spearman", chaque colonne est
+    classée une fois ; les paires retenues dont les données manquantes diffèrent sont
+    recalculées exactement. Retourne le même format que `strong_pairs`.
+    """
+    if method not in ("pearson", "spearman"):
+        raise ValueError(f"Méthode non disponible pour le calcul par blocs : {method}")
+    columns = list(columns)
+    values = df[columns].to_numpy(dtype=float)
+    finite = np.isfinite(values)
+    if method == "spearman":
+        values, _ = rank_columns(values)
+    # Stockage par colonnes : chaque bloc de colonnes est contigu en mémoire
+    standardized = np.asfortranarray(_standardize(values, finite))
+    if finite.all():
+        squares = weights = None
+    else:
+        squares = standardized ** 2
+        weights = np.asfortranarray(finite, dtype=float)
+
+    heap = []
+    kept = []
+    starts = range(0, len(columns), block_size)
+    for first_start in starts:
+        first = slice(first_start, min(first_start + block_size, len(columns)))
+        for second_start in starts:
+            if second_start < first_start:
+                continue
+            second = slice(second_start, min(second_start + block_size, len(columns)))
+            n, r = _pearson_block(standardized, squares, weights, first, second)
+            # Triangle supérieur uniquement : chaque paire n'est vue qu'une fois
+            rows, cols = np.nonzero(
+                np.triu(np.ones(r.shape, dtype=bool), k=1) if first == second
+                else np.ones(r.shape, dtype=bool)
+            )
+            strength = np.abs(r[rows, cols])
+            candidates = ~np.isnan(strength)
+            if threshold is not None:
+                candidates &= strength > threshold
+            rows, cols, strength = rows[candidates], cols[candidates], strength[candidates]
+            if top_k is not None and len(strength) > top_k:
+                # Pré-sélection vectorisée des k plus fortes du bloc avant le tas
+                best = np.argpartition(-strength, top_k - 1)[:top_k]
+                rows, cols, strength = rows[best], cols[best], strength[best]
+            for row, col, value in zip(rows, cols, strength):
+                item = (value, first.start + row, second.start + col, r[row, col], n[row, col])
+                if top_k is None:
+                    kept.append(item)
+                elif len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif value > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+
+    items = kept if top_k is None else heap
+    first = np.array([item[1] for item in items], dtype=np.int64)
+    second = np.array([item[2] for item in items], dtype=np.int64)
+    r = np.array([item[3] for item in items], dtype=float)
+    n = np.array([item[4] for item in items], dtype=float)
+    if method == "spearman" and len(items):
+        own = finite.sum(axis=0)
+        reranked = (n != own[first]) | (n != own[second])
+        if reranked.any():
+            _, r[reranked] = _spearman_columns(df[columns].to_numpy(dtype=float), first[reranked], second[reranked])
+
+    labels = np.asarray(columns, dtype=object)
+    pairs = pd.DataFrame({
+        "variable_1": labels[first],
+        "variable_2": labels[second],
+        "r": r,
+        "n": n,
+        "p": _correlation_p_values(r, n)
+    })
+    order = np.argsort(-np.abs(r), kind="stable")
+    return pairs.iloc[order].reset_index(drop=True)